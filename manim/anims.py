@@ -2,6 +2,9 @@
 from pathlib import Path
 
 from prng import *
+from utils.polynomials import Var
+from utils.random_bits import random_bits
+from utils.section_cache import SectionCache
 from utils.util_general import *
 
 
@@ -257,11 +260,10 @@ class PrngIntro(Scene):
         self.play(Create(ar))
 
         # create a tex object with 5 lines, each containing 10 random bits
+        bits_rng = scene_random(self, "bits")
         pseudorandom_str = r"\raggedright "
         for i in range(10):
-            pseudorandom_str += (
-                r"$" + "".join([str(random.randint(0, 1)) for _ in range(24)]) + r"$"
-            )
+            pseudorandom_str += r"$" + random_bits(24, bits_rng).string + r"$"
             pseudorandom_str += r"\\ "
 
         pseudorandom_tex = Tex(
@@ -288,9 +290,7 @@ class PrngIntro(Scene):
 
         pseudorandom_str = r"\raggedright "
         for i in range(10):
-            pseudorandom_str += (
-                r"$" + "".join([str(random.randint(0, 1)) for _ in range(24)]) + r"$"
-            )
+            pseudorandom_str += r"$" + random_bits(24, bits_rng).string + r"$"
             pseudorandom_str += r"\\ "
 
         random_tex = Tex(pseudorandom_str, color=text_color, font_size=40).move_to(
@@ -373,7 +373,7 @@ class PolynomialsIntro(Scene):
         self.wait()
 
 
-class PolynomialsMultiplyingOut(Scene):
+class PolynomialsMultiplyingOut(SectionCache, Scene):
     def construct(self):
         set_default_colors()
         self.next_section(skip_animations=False)
@@ -465,7 +465,7 @@ class PolynomialsMultiplyingOut(Scene):
             )
 
 
-class PolynomialsIntro2(Scene):
+class PolynomialsIntro2(SectionCache, Scene):
     def construct(self):
         set_default_colors()
         self.next_section(skip_animations=False)
@@ -491,7 +491,8 @@ class PolynomialsIntro2(Scene):
         # animation for generating a random integer
         test_int = 42987
         len = 10
-        random_ints = [random.randint(0, 100000) for _ in range(len)]
+        ints_rng = scene_random(self, "ints")
+        random_ints = [ints_rng.randint(0, 100000) for _ in range(len)]
         random_ints_tex = [
             Tex(str(i), color=text_color, font_size=fs)
             .move_to(polynomials[0].get_center())
@@ -500,8 +501,9 @@ class PolynomialsIntro2(Scene):
         ]
 
         run_time = 0.2
+        click_rng = scene_random(self, "clicks")
         for i in range(len + 1):
-            self.add_sound(random_click_file())
+            self.add_sound(random_click_file(click_rng))
             if i == 0:
                 self.play(FadeIn(random_ints_tex[0]), run_time=run_time)
             else:
@@ -511,11 +513,13 @@ class PolynomialsIntro2(Scene):
 
         self.wait()
 
-        val1 = ((test_int + 1) ** 10000) % (10**9 + 7)
-        val2 = ((test_int + 2) ** 20000) % (10**9 + 7)
-        val3 = val1 * val2 % (10**9 + 7)
-        val4 = (test_int**3 + 5 * test_int**2 + 8 * test_int + 5) % (10**9 + 7)
-        val5 = val4**10000 % (10**9 + 7)
+        x = Var("x")
+        p = 10**9 + 7
+        val1 = int(((x + 1) ** 10000).evaluate({"x": test_int}, p))
+        val2 = int(((x + 2) ** 20000).evaluate({"x": test_int}, p))
+        val3 = val1 * val2 % p
+        val4 = int((x**3 + 5 * x**2 + 8 * x + 5).evaluate({"x": test_int}, p))
+        val5 = pow(val4, 10000, p)
 
         p1 = [
             Tex(str, color=text_color, font_size=fs).move_to(polynomials[0])
@@ -816,13 +820,12 @@ class Recap(Scene):
         prng = PRNG("NW").scale(0.8)
         truly = Tex(r"Random bits", color=text_color, font_size=fs)
 
+        bits_rng = scene_random(self, "bits")
         bits = []
         for i in range(2):
             bits_str = ""
             for j in range(3):
-                bits_str += (
-                    "".join([str(random.randint(0, 1)) for _ in range(20)]) + r" \\ "
-                )
+                bits_str += random_bits(20, bits_rng).string + r" \\ "
             bits.append(Tex(bits_str, color=text_color, font_size=40))
 
         truly_group = Group(truly, bits[0]).arrange(DOWN, buff=0.5)
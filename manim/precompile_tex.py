@@ -0,0 +1,118 @@
+# python precompile_tex.py [file.py ...]
+#
+# Fills the Tex cache (utils/tex_cache.py) before rendering, so that the scenes
+# do not start one LaTeX and one dvisvgm process per expression. The
+# Tex/MathTex calls with literal arguments are found by reading the scene files
+# and utils/; each is then constructed up to the point where manim would
+# compile it, which gives exactly the document manim would write. The missing
+# documents are compiled as the pages of one document per template. Strings
+# built at render time (f-strings, digits of pi) are compiled on demand as
+# before.
+
+import argparse
+import ast
+import glob
+import sys
+
+import manim.mobject.text.tex_mobject as tex_mobject
+from manim._config import config
+from utils.tex_cache import TEX_DIR, compile_svg, compile_svgs, tex_key
+
+FILENAMES = ["anims.py", "prng.py", "statistical_test.py", *glob.glob("utils/*.py")]
+TEX_CLASSES = {"Tex", "MathTex", "SingleStringMathTex"}
+# the arguments that change the LaTeX document; the others (colors, sizes) are
+# applied to the parsed SVG
+TEX_KEYWORDS = {
+    "arg_separator",
+    "substrings_to_isolate",
+    "tex_to_color_map",
+    "tex_environment",
+}
+
+
+def find_tex_calls(filename):
+    # (class name, args, kwargs) of every call with literal TeX arguments
+    tree = ast.parse(open(filename).read(), filename)
+    calls = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        name = getattr(node.func, "id", getattr(node.func, "attr", None))
+        if name not in TEX_CLASSES:
+            continue
+        try:
+            args = [ast.literal_eval(arg) for arg in node.args]
+            kwargs = {
+                keyword.arg: ast.literal_eval(keyword.value)
+                for keyword in node.keywords
+                if keyword.arg in TEX_KEYWORDS
+            }
+        except (ValueError, TypeError):  # a name, an f-string, *args
+            continue
+        if all(isinstance(arg, str) for arg in args):
+            calls.append((name, tuple(args), kwargs))
+    return calls
+
+
+class _Compiled(Exception):
+    pass
+
+
+def tex_documents(calls):
+    # {key: (document, template)} of the calls, by constructing them with a
+    # tex_to_svg_file that records its arguments and stops
+    documents = {}
+
+    def record(expression, environment=None, tex_template=None):
+        tex_template = tex_template or config["tex_template"]
+        key, code = tex_key(expression, environment, tex_template)
+        documents[key] = code, tex_template
+        raise _Compiled
+
+    tex_to_svg_file = tex_mobject.tex_to_svg_file
+    tex_mobject.tex_to_svg_file = record
+    try:
+        for name, args, kwargs in calls:
+            try:
+                getattr(tex_mobject, name)(*args, **kwargs)
+            except _Compiled:
+                pass
+            except Exception as error:
+                print(f"skipped {name}{args}: {error}", file=sys.stderr)
+    finally:
+        tex_mobject.tex_to_svg_file = tex_to_svg_file
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*", default=FILENAMES)
+    args = parser.parse_args()
+
+    calls = {
+        repr(call): call for filename in args.files for call in find_tex_calls(filename)
+    }
+    documents = tex_documents(calls.values())
+    # one document per template
+    batches = {}
+    for key, (code, tex_template) in documents.items():
+        if not (TEX_DIR / f"{key}.svg").exists():
+            batches.setdefault(id(tex_template), (tex_template, {}))[1][key] = code
+    missing = sum(len(codes) for _, codes in batches.values())
+    print(f"{len(documents)} expressions, {missing} to compile")
+
+    for tex_template, codes in batches.values():
+        # OSError: latex or dvisvgm is missing
+        try:
+            compile_svgs(codes, tex_template)
+        except (ValueError, RuntimeError, OSError) as error:
+            print(f"batch failed ({error}), compiling one by one", file=sys.stderr)
+            for key, code in codes.items():
+                try:
+                    compile_svg(code, tex_template, TEX_DIR / f"{key}.svg")
+                except (ValueError, RuntimeError, OSError) as error:
+                    print(error, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+from utils.bit_sources import bit_source
 from utils.funnel import Funnel
+from utils.nisan_wigderson import NisanWigderson
+from utils.polynomials import IdentityTester
+from utils.random_bits import random_bits
+from utils.section_cache import SectionCache
 from utils.util_general import *
 
 set_default_colors()
@@ -23,8 +28,12 @@ class AnnotatedArrow(Arrow):
 
 
 class PRNG(VGroup):
-    def __init__(self, name="PRNG"):
+    def __init__(self, name="PRNG", generator=None):
         super().__init__()
+        # Optional engine producing the actual bits, see `output`
+        self.generator = generator
+        if generator is None and name == "NW":
+            self.generator = NisanWigderson(m=1024, ell=11, a=2)
         self.box = Rectangle(
             color=BLUE, fill_color=BLUE, fill_opacity=1, width=2.5, height=1.5
         )
@@ -44,6 +53,10 @@ class PRNG(VGroup):
         # almost instantly. This looks nicer.
         return AnimationGroup(Create(self.box), Write(self.text))
 
+    def output(self, seed, n=None):
+        # The first n output bits for `seed`, as a "0101" string
+        return self.generator.output_string(seed)[:n]
+
     def set_seed(self, seed: str, buff=1.5, scale=1):
         if seed is None:
             new_seed = nil_object()
@@ -88,8 +101,10 @@ class PRNG(VGroup):
 
 
 class Algo(VGroup):
-    def __init__(self):
+    def __init__(self, backend=None):
         super().__init__()
+        # Optional engine computing the output from the input, see `run`
+        self.backend = backend
         self.box = Rectangle(
             color=RED, fill_color=RED, fill_opacity=1, width=2.5, height=1.5
         ).scale(0.8)
@@ -99,6 +114,7 @@ class Algo(VGroup):
 
         self.arrows = [None, None, None]
         self.inputs = [None, None, None]
+        self.values = [None, None, None]
 
     @override_animation(Create)  # Create(PRNG()) will run this method
     def _create(self):
@@ -106,7 +122,12 @@ class Algo(VGroup):
         # almost instantly. This looks nicer.
         return AnimationGroup(Create(self.box), Write(self.text))
 
+    def run(self):
+        # The output for the current input, e.g. "=" from an `IdentityTester`
+        return self.backend(self.values[0])
+
     def set_input(self, input: str, pos: int, no_text=False, write=True):
+        self.values[pos] = input
         if not input:
             new_input = nil_object()
         else:
@@ -219,20 +240,11 @@ class PRNGIntro(Scene):
         self.play(seed_brace.creation_anim(label_anim=Write))
         self.wait()
 
+        bits_rng = scene_random(self, "bits")
         out_strs = []
         for it in range(4):
-            output_str = ""
-            for i in range(1):
-                for j in range(16):
-                    if it < 3:
-                        output_str += random.choice("01")
-                    else:
-                        if j % 2 == 0:
-                            output_str += "0"
-                        else:
-                            output_str += "0"
-                output_str += r"\\ "
-            out_strs.append(output_str)
+            output_str = random_bits(16, bits_rng).string if it < 3 else "0" * 16
+            out_strs.append(output_str + r"\\ ")
 
         output = Tex(out_strs[0], color=BASE00).shift(RIGHT * 4)
         self.play(
@@ -291,7 +303,7 @@ class PRNGIntro(Scene):
         self.wait()
 
 
-class BPP(Scene):
+class BPP(SectionCache, Scene):
     def construct(self):
         set_default_colors()
         COLOR_SAME = GREEN
@@ -305,7 +317,9 @@ class BPP(Scene):
         self.play(FadeOut(plan_tex))
         self.wait()
 
-        algo = Algo().shift(3 * RIGHT)
+        # seeded, so that every render shows the same verdicts
+        source = bit_source("seeded", seed=derive_seed("BPP", "identity"))
+        algo = Algo(backend=IdentityTester(source)).shift(3 * RIGHT)
 
         self.play(Create(algo))
         self.wait()
@@ -403,7 +417,9 @@ class BPP(Scene):
         self.play(Transform(algo.inputs[0], new_input2))
         self.wait()
 
-        self.play(algo.set_output("=", color=COLOR_SAME, scale=2), FadeOut(forty))
+        self.play(
+            algo.set_output(algo.run(), color=COLOR_SAME, scale=2), FadeOut(forty)
+        )
         self.wait()
 
         self.play(
@@ -412,7 +428,7 @@ class BPP(Scene):
         )
         self.wait()
 
-        self.play(algo.set_output(r"$\ne$", color=COLOR_DIFFERENT, scale=2))
+        self.play(algo.set_output(algo.run(), color=COLOR_DIFFERENT, scale=2))
         self.wait()
 
         prob_tex = (
@@ -0,0 +1,121 @@
+# python render_all.py [--quality k] [--workers N] [--scenes Name ...] [--profile]
+#
+# Renders every scene of the video, one `manim` process per scene, in a pool of
+# workers. The scenes are found by reading the source files (nothing is
+# imported) and started longest first, using the durations of earlier runs;
+# scenes without a recorded duration go first. The Tex cache is filled first
+# by precompile_tex.py.
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.cache import atomic_write, cache_dir
+
+FILENAMES = ["anims.py", "prng.py", "statistical_test.py"]
+DURATIONS = cache_dir("render") / "durations.json"
+
+
+def find_scenes(filename):
+    # Classes deriving from Scene, MovingCameraScene, ... or from another scene
+    # class of the same file. Names starting with "_" are skipped.
+    tree = ast.parse(open(filename).read(), filename)
+    scenes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or node.name.startswith("_"):
+            continue
+        bases = [getattr(base, "id", getattr(base, "attr", "")) for base in node.bases]
+        if any(base.endswith("Scene") or base in scenes for base in bases):
+            scenes.append(node.name)
+    return scenes
+
+
+def load_durations():
+    try:
+        return json.loads(DURATIONS.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_durations(durations):
+    with atomic_write(DURATIONS) as f:
+        f.write(json.dumps(durations, indent=1, sort_keys=True).encode())
+
+
+def render(filename, scene, quality, log_dir, env=None):
+    start = time.perf_counter()
+    with open(log_dir / f"{filename[:-3]}.{scene}.log", "wb") as log:
+        result = subprocess.run(
+            ["manim", f"-q{quality}", filename, scene],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env=env,
+        )
+    return result.returncode, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quality", default="k", help="l, m, h, p or k, as in manim")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--files", nargs="+", default=FILENAMES)
+    parser.add_argument("--scenes", nargs="+", help="only these scenes")
+    parser.add_argument("--dry-run", action="store_true", help="print the order")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="write cache/profile, see utils/profiling.py",
+    )
+    args = parser.parse_args()
+
+    durations = load_durations()
+    jobs = [
+        (filename, scene)
+        for filename in args.files
+        for scene in find_scenes(filename)
+        if not args.scenes or scene in args.scenes
+    ]
+
+    def key(job):
+        return f"{job[0]}:{job[1]}:{args.quality}"
+
+    jobs.sort(key=lambda job: -durations.get(key(job), float("inf")))
+    if args.dry_run:
+        for job in jobs:
+            print(f"{durations.get(key(job), '?'):>10} {job[0]} {job[1]}")
+        return
+
+    # the literal Tex strings of all files in one LaTeX run
+    subprocess.run([sys.executable, "precompile_tex.py"])
+
+    log_dir = cache_dir("render_logs")
+    env = dict(os.environ, SCENE_PROFILE="1") if args.profile else None
+    failed = []
+    with ThreadPoolExecutor(args.workers) as executor:
+        futures = {
+            executor.submit(render, *job, args.quality, log_dir, env): job
+            for job in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            returncode, seconds = future.result()
+            if returncode:
+                failed.append(job)
+            else:
+                durations[key(job)] = round(seconds, 1)
+                save_durations(durations)
+            status = "FAILED" if returncode else f"{seconds:.0f} s"
+            print(f"[{done}/{len(jobs)}] {job[0]} {job[1]}: {status}", flush=True)
+
+    if failed:
+        print(f"{len(failed)} scenes failed, logs in {log_dir}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
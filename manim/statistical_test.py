@@ -1,11 +1,13 @@
 from prng import *
 from utils.funnel import *
+from utils.pi_digits import DigitStore
+from utils.section_cache import SectionCache
 from utils.util_general import *
 
 from manim.mobject.svg.brace import BraceText
 
-with open("pi.txt") as f:
-    PI = "".join(f.read().split())
+# PI[0] is the 3, PI[k] the k-th decimal digit
+PI = DigitStore.from_text("pi.txt")
 
 
 class StatisticalTest(Scene):
@@ -37,7 +39,7 @@ class StatisticalTest(Scene):
         self.wait(5)
 
 
-class Pi(Scene):
+class Pi(SectionCache, Scene):
     def do_that_thingy_with_the_funnelses(self, funnels, copies, scale=0.4):
         self.play(
             AnimationGroup(
@@ -163,7 +165,7 @@ class Pi(Scene):
         self.play(prng.seed.animate.become(seed))
         self.wait()
 
-        pi = Tex(r"\hsize=200cm $\pi$ = " + PI[:600])
+        pi = Tex(r"\hsize=200cm $\pi$ = " + PI[0:1] + "." + PI[1:599])
         marks = []
         for i in range(10, len(pi[0]) - 3, 10):
             mark = (
@@ -0,0 +1,36 @@
+import numpy as np
+from utils.modular import modulus
+from utils.polynomials import PRIMES, Var
+
+# Points may be integers of any size and sign, as for constants.
+
+X = Var("x")
+EXPR = (X + 1) * (X + 2) + 3
+
+
+def expected(value, p):
+    return ((value + 1) * (value + 2) + 3) % p
+
+
+def test_negative_point():
+    assert (X + 1).evaluate({"x": -1}, 7) == 0
+    assert EXPR.evaluate({"x": -5}, PRIMES[0]) == expected(-5, PRIMES[0])
+
+
+def test_huge_point():
+    value = 2**100 + 12345
+    assert EXPR.evaluate({"x": value}, PRIMES[0]) == expected(value, PRIMES[0])
+
+
+def test_mixed_array_point():
+    values = [-(2**80), -3, 0, 5, 2**70]
+    result = EXPR.evaluate({"x": np.array(values, dtype=object)}, PRIMES[:2])
+    assert result.tolist() == [[expected(v, p) for v in values] for p in PRIMES[:2]]
+
+
+def test_reduce_signed_array():
+    field = modulus(tuple(PRIMES[:2]))
+    values = np.array([-7, -1, 0, 1, 2**62], dtype=np.int64)
+    assert field.reduce(values).tolist() == [
+        [int(v) % p for v in values] for p in PRIMES[:2]
+    ]
@@ -0,0 +1,22 @@
+import itertools
+
+import numpy as np
+from utils.bit_sources import NWSource
+from utils.nisan_wigderson import inner_product
+from utils.stat_tests import run_battery
+
+# The generator behind PRNG("NW") and the "nw" bit source must at least pass
+# the battery of the series on random seeds.
+
+
+def test_inner_product_balanced_for_odd_ell():
+    bits = np.array(list(itertools.product([0, 1], repeat=7)), dtype=np.uint8)
+    assert inner_product(bits).mean() == 0.5
+
+
+def test_default_generator_passes_battery():
+    generator = NWSource(seed=0).generator
+    rng = np.random.default_rng(0)
+    seeds = rng.integers(0, 2, (200, generator.seed_bits), dtype=np.uint8)
+    results = run_battery(generator.generate_many(seeds).ravel())
+    assert min(result.p_value for result in results.values()) > 0.01
@@ -0,0 +1,20 @@
+import pickle
+
+from utils.pi_digits import PiCache, compute_pi
+
+# A growing cache extends the stored series instead of summing it again, and
+# gives the digits of one computation.
+
+DIGITS = "".join(map(str, compute_pi(5000)))
+
+
+def test_cache_extends_series(tmp_path):
+    cache = PiCache(tmp_path, chunk_digits=1000)
+    assert cache[0:1500] == DIGITS[:1500]
+    (series_file,) = tmp_path.glob("series_*.pickle")
+    terms = pickle.loads(series_file.read_bytes())[0]
+
+    cache = PiCache(tmp_path, chunk_digits=1000)
+    assert cache[2000:4500] == DIGITS[2000:4500]
+    assert pickle.loads(series_file.read_bytes())[0] > terms
+    assert cache[4499] == int(DIGITS[4499])
@@ -0,0 +1,50 @@
+import io
+
+import numpy as np
+import pytest
+from utils.stat_parallel import run_file_parallel, run_parallel
+from utils.stat_stream import StreamingBattery, run_stream
+from utils.stat_tests import SerialTest, battery, run_battery
+
+# Chunked and sharded runs must give exactly the results of one run over the
+# whole buffer, also when the pieces are shorter than a serial test window.
+
+RNG = np.random.default_rng(0)
+PACKED = RNG.integers(0, 256, 4097, dtype=np.uint8)
+BITS = np.unpackbits(PACKED)
+
+
+@pytest.mark.parametrize("piece", [1, 3, 8, 15, 1000])
+def test_pieces_shorter_than_window(piece):
+    test = SerialTest(2, 9)
+    engine = StreamingBattery([test])
+    for start in range(0, len(BITS), piece):
+        engine.update(BITS[start : start + piece])
+    assert engine.finish() == {"serial": test(BITS)}
+
+
+def test_short_last_read():
+    tests = [SerialTest(2, 12)]
+    result = run_stream(io.BytesIO(PACKED.tobytes()), tests=tests, chunk_bytes=4096)
+    assert result == run_battery(BITS, tests=tests)
+
+
+def test_chunked_battery():
+    result = run_stream(io.BytesIO(PACKED.tobytes()), chunk_bytes=1)
+    assert result == run_battery(BITS)
+
+
+def test_parallel_short_shards():
+    tests = [SerialTest(2, 12)]
+    assert run_parallel(BITS, tests=tests, workers=2, shard_digits=5) == (
+        run_battery(BITS, tests=tests)
+    )
+
+
+def test_file_parallel_short_last_shard(tmp_path):
+    path = tmp_path / "bits.bin"
+    PACKED.tofile(path)
+    tests = battery(2)
+    assert run_file_parallel(path, tests=tests, workers=2, shard_digits=4096 * 8) == (
+        run_battery(BITS, tests=tests)
+    )
@@ -0,0 +1,93 @@
+import math
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+
+# Amplification of a Monte Carlo decision (`BPP`, `Recap`): an algorithm that
+# answers correctly with probability >= 99% is repeated until Wald's sequential
+# probability ratio test can tell "accepts with p >= p_yes" from "accepts with
+# p <= p_no" with the requested error, instead of a fixed number of times.
+# With the defaults, four agreeing trials settle it.
+
+
+@dataclass(frozen=True)
+class AmplifiedResult:
+    answer: bool
+    trials: int
+    accepts: int
+    log_ratio: float
+    decided: bool  # False if max_trials ran out first
+
+
+class SPRT:
+    def __init__(self, p_yes=0.99, p_no=0.01, error=1e-6):
+        self.accept_step = math.log(p_yes / p_no)
+        self.reject_step = math.log((1 - p_yes) / (1 - p_no))
+        # Wald's thresholds, with both error probabilities equal to `error`
+        self.upper = math.log((1 - error) / error)
+        self.lower = -self.upper
+        self.log_ratio = 0.0
+        self.trials = 0
+        self.accepts = 0
+
+    def update(self, outcome):
+        self.trials += 1
+        self.accepts += bool(outcome)
+        self.log_ratio += self.accept_step if outcome else self.reject_step
+
+    @property
+    def decided(self):
+        return not self.lower < self.log_ratio < self.upper
+
+    def min_trials(self):
+        # trials needed when they all agree
+        return math.ceil(self.upper / min(self.accept_step, -self.reject_step))
+
+    def result(self):
+        return AmplifiedResult(
+            self.log_ratio > 0, self.trials, self.accepts, self.log_ratio, self.decided
+        )
+
+
+def _run_trials(trial, args, count):
+    return [bool(trial(*args)) for _ in range(count)]
+
+
+def amplify(
+    trial,
+    *args,
+    p_yes=0.99,
+    p_no=0.01,
+    error=1e-6,
+    max_trials=10_000,
+    executor=None,
+    workers=1,
+    batch=None,
+):
+    # `trial(*args)` returns True (accept) or False. Without an executor the
+    # trials run here one by one. With one (e.g. a ProcessPoolExecutor shared
+    # between inputs), batches of trials run in it, two per worker in flight
+    # (`workers`: how many the executor was created with), and the batches
+    # still pending when the test stops are cancelled.
+    test = SPRT(p_yes, p_no, error)
+    if executor is None:
+        while not test.decided and test.trials < max_trials:
+            test.update(trial(*args))
+        return test.result()
+
+    batch = batch or test.min_trials()
+    in_flight = 2 * workers
+    submitted = 0
+    pending = set()
+    while not test.decided and test.trials < max_trials:
+        while len(pending) < in_flight and submitted < max_trials:
+            count = min(batch, max_trials - submitted)
+            pending.add(executor.submit(_run_trials, trial, args, count))
+            submitted += count
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            for outcome in future.result():
+                if not test.decided and test.trials < max_trials:
+                    test.update(outcome)
+    for future in pending:
+        future.cancel()
+    return test.result()
@@ -0,0 +1,176 @@
+import hashlib
+import os
+
+import numpy as np
+from utils.nisan_wigderson import NisanWigderson
+
+# Where the "random bits" arrow of `Algo` gets its bits from. A source hands
+# out bytes in bulk with `read`; `bits` and `integers` are built on top of it.
+# Sources are registered by name, so that the algorithms can be run with truly
+# random bits or with a PRNG without knowing which:
+#
+#     source = bit_source("nw", seed=12345)
+#     source.integers(1000, 4294967291)
+
+SOURCES = {}
+
+
+def register(name):
+    def decorator(cls):
+        SOURCES[name] = cls
+        cls.name = name
+        return cls
+
+    return decorator
+
+
+def bit_source(source=None, **kwargs):
+    # a registered source by name ("os" if None), or `source` if it is one
+    if isinstance(source, BitSource):
+        return source
+    name = source or "os"
+    if name not in SOURCES:
+        raise ValueError(f"unknown bit source {name!r}, one of {sorted(SOURCES)}")
+    return SOURCES[name](**kwargs)
+
+
+class BitSource:
+    def read(self, nbytes):
+        # nbytes random bytes as a uint8 array
+        raise NotImplementedError
+
+    def bits(self, n):
+        return np.unpackbits(self.read(-(-n // 8)))[:n]
+
+    def integers(self, count, modulus):
+        # Uniform integers in [0, modulus), modulus <= 2^64, by rejection: draw
+        # just enough bits for modulus - 1 and drop values that are too large.
+        # Fewer than half are dropped, so each round asks for 2x what is missing.
+        bits = max(1, (modulus - 1).bit_length())
+        width = -(-bits // 8)
+        mask = np.uint64((1 << bits) - 1)
+        found = []
+        missing = count
+        while missing > 0:
+            draw = 2 * missing + 16
+            raw = np.zeros((draw, 8), dtype=np.uint8)
+            raw[:, :width] = self.read(draw * width).reshape(draw, width)
+            values = raw.view("<u8").ravel() & mask
+            values = values[values <= np.uint64(modulus - 1)][:missing]
+            found.append(values)
+            missing -= len(values)
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.uint64)
+
+
+@register("os")
+class OSSource(BitSource):
+    # the operating system's entropy pool
+    def read(self, nbytes):
+        return np.frombuffer(os.urandom(nbytes), dtype=np.uint8)
+
+
+@register("seeded")
+class SeededSource(BitSource):
+    # numpy's PCG64; reproducible for a given seed
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def read(self, nbytes):
+        return np.frombuffer(self.rng.bytes(nbytes), dtype=np.uint8)
+
+
+@register("nw")
+class NWSource(BitSource):
+    # The Nisan-Wigderson generator of `PRNG("NW")`: the first m bits are its
+    # output for `seed` (random if None). Consecutive seeds differ in a few bits
+    # and give correlated outputs, so later blocks use hashes of (seed, block).
+    def __init__(self, seed=None, generator=None):
+        self.generator = generator or NisanWigderson(m=1024, ell=11, a=2)
+        if seed is None:
+            seed = int.from_bytes(os.urandom(-(-self.generator.seed_bits // 8)), "big")
+        self.seed = seed % (1 << self.generator.seed_bits)
+        self.block = 0
+        self.buffer = np.zeros(0, dtype=np.uint8)
+
+    def _block_seed(self):
+        if self.block == 0:
+            return self.seed
+        digest = hashlib.blake2b(
+            f"{self.seed}:{self.block}".encode(),
+            digest_size=-(-self.generator.seed_bits // 8),
+        ).digest()
+        return int.from_bytes(digest, "big") % (1 << self.generator.seed_bits)
+
+    def read(self, nbytes):
+        outputs = [self.buffer]
+        available = len(self.buffer)
+        while available < 8 * nbytes:
+            outputs.append(self.generator.generate(self._block_seed()))
+            self.block += 1
+            available += self.generator.m
+        bits = np.concatenate(outputs)
+        self.buffer = bits[8 * nbytes :]
+        return np.packbits(bits[: 8 * nbytes])
+
+
+############### COUNTER-BASED GENERATORS
+# Output word i is a fixed function of (seed, i), so jumping ahead is setting i,
+# and workers get disjoint ranges of i: worker N's stream starts at
+# N * STREAM_WORDS. Nothing is shared between processes.
+
+
+class CounterSource(BitSource):
+    def __init__(self, seed=0, stream=0):
+        if not 0 <= stream < self.max_streams:
+            raise ValueError(f"stream must be in [0, {self.max_streams})")
+        self.seed = seed
+        self.start = stream * self.stream_words
+        self.position = 0  # words read so far
+
+    def jump(self, words):
+        # skip `words` 64-bit outputs, in O(1)
+        self.position += words
+
+    def words(self, count):
+        words = self._words(self.start + self.position, count)
+        self.position += count
+        return words
+
+    def read(self, nbytes):
+        words = self.words(-(-nbytes // 8))
+        return words.astype("<u8").view(np.uint8)[:nbytes]
+
+
+@register("splitmix64")
+class SplitMix64Source(CounterSource):
+    # Steele, Lea, Flood: word i is mix(seed + (i + 1) * GAMMA)
+    GAMMA = np.uint64(0x9E3779B97F4A7C15)
+    stream_words = 1 << 40
+    max_streams = 1 << 24
+
+    def _words(self, first, count):
+        z = np.arange(first + 1, first + count + 1, dtype=np.uint64) * self.GAMMA
+        z += np.uint64(self.seed % (1 << 64))
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+@register("philox")
+class PhiloxSource(CounterSource):
+    # numpy's Philox4x64 (Salmon et al.): 4 words per 256-bit counter value
+    stream_words = 1 << 130
+    max_streams = 1 << 120
+
+    def __init__(self, seed=0, stream=0):
+        super().__init__(seed, stream)
+        self.key = np.random.Philox(seed).state["state"]["key"]
+
+    def _words(self, first, count):
+        generator = np.random.Philox(key=self.key, counter=first // 4)
+        return generator.random_raw(first % 4 + count)[first % 4 :]
+
+
+def streams(name, seed, workers):
+    # one independent source per worker, e.g. for a process pool
+    return [bit_source(name, seed=seed, stream=worker) for worker in range(workers)]
@@ -0,0 +1,34 @@
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+# Everything that is expensive to compute and safe to reuse between runs lives
+# under one directory. Point DERANDOMIZATION_CACHE somewhere shared to reuse it
+# across checkouts or machines.
+
+CACHE_ROOT = Path(
+    os.environ.get(
+        "DERANDOMIZATION_CACHE", Path(__file__).resolve().parent.parent / "cache"
+    )
+)
+
+
+def cache_dir(name):
+    path = CACHE_ROOT / name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def atomic_write(path):
+    # Write to a temporary file and rename it into place, so that concurrent
+    # readers (and writers) only ever see complete files.
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            yield f
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
@@ -0,0 +1,101 @@
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+# "Run the algorithm on all seeds and take the majority" (`PseudocodeBruteforce`
+# in anims.py). The seeds are split into batches that run in a pool of
+# processes; the vote stops as soon as no outcome of the remaining seeds can
+# change the winner, and the batches not yet started are cancelled.
+
+MAX_SEED_BITS = 32  # 4 billion runs of the algorithm
+
+
+@dataclass
+class MajorityResult:
+    answer: object
+    votes: Counter
+    evaluated: int
+    seeds: int
+
+    @property
+    def decided_early(self):
+        return self.evaluated < self.seeds
+
+
+_worker = {}
+
+
+def _init_worker(algorithm, instance, generator):
+    # sent once per process rather than with every batch
+    _worker.update(algorithm=algorithm, instance=instance, generator=generator)
+
+
+def _run_batch(start, stop):
+    algorithm, instance = _worker["algorithm"], _worker["instance"]
+    generator = _worker["generator"]
+    votes = Counter()
+    for seed in range(start, stop):
+        bits = seed if generator is None else generator.generate(seed)
+        votes[algorithm(instance, bits)] += 1
+    return votes, stop - start
+
+
+def decided(votes, remaining):
+    # True when the leader stays ahead even if every remaining seed votes for
+    # the runner-up
+    top = votes.most_common(2) + [(None, 0), (None, 0)]
+    return top[0][1] > top[1][1] + remaining
+
+
+def run_all_seeds(
+    algorithm,
+    instance,
+    seed_bits=None,
+    generator=None,
+    workers=None,
+    batch_seeds=None,
+):
+    # `algorithm(instance, bits)` must return something hashable. `bits` is the
+    # seed itself, or `generator.generate(seed)` if a generator (such as
+    # `NisanWigderson`) is given; then seed_bits defaults to its seed length.
+    # algorithm, instance and generator have to be picklable.
+    if seed_bits is None:
+        seed_bits = generator.seed_bits
+    if seed_bits > MAX_SEED_BITS:
+        raise ValueError(
+            f"{seed_bits}-bit seeds are too many to run on all of them "
+            f"(at most {MAX_SEED_BITS} bits)"
+        )
+    seeds = 1 << seed_bits
+    workers = workers or os.cpu_count()
+    batch_seeds = batch_seeds or max(1, seeds // (16 * workers))
+
+    votes = Counter()
+    evaluated = 0
+    batches = iter(range(0, seeds, batch_seeds))
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(algorithm, instance, generator)
+    ) as executor:
+        pending = set()
+        while True:
+            # keep 2 batches per worker in flight, so that stopping early does
+            # not leave a long queue behind
+            for start in batches:
+                stop = min(seeds, start + batch_seeds)
+                pending.add(executor.submit(_run_batch, start, stop))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch_votes, count = future.result()
+                votes.update(batch_votes)
+                evaluated += count
+            if decided(votes, seeds - evaluated):
+                for future in pending:
+                    future.cancel()
+                break
+    answer = votes.most_common(1)[0][0] if votes else None
+    return MajorityResult(answer, votes, evaluated, seeds)
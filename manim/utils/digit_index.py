@@ -0,0 +1,211 @@
+import numpy as np
+
+# Substring search over a long digit sequence (the "pi-checking test" in `Pi`).
+#
+# The digits are split into segments, each with its own FM-index, which answers
+# "how many times and where" in O(pattern length). Segments are merged like a
+# binary counter as digits arrive, so there are O(log n) of them. Each segment
+# also indexes the `max_pattern - 1` digits before it, so every occurrence of a
+# pattern up to that length lies inside some segment.
+
+OCC_SAMPLE = 64
+SEGMENT_DIGITS = 1 << 16
+
+
+def suffix_array(text):
+    # Prefix doubling: sort by the first 2^i symbols, i = 0, 1, ... Ranks and
+    # the result are 32-bit; only the sort keys (rank pairs) need 64 bits.
+    n = len(text)
+    if n >= 1 << 32:
+        raise ValueError("segments are limited to 2^32 - 1 symbols")
+    if n == 0:
+        return np.zeros(0, dtype=np.uint32)
+    rank = np.array(text, dtype=np.uint32)
+    base = np.uint64(max(n, int(rank.max()) + 1) + 1)
+    ranks = np.empty(n, dtype=np.uint32)
+    step = 1
+    while True:
+        key = rank.astype(np.uint64)
+        key *= base
+        key[: n - step] += rank[step:]
+        key[: n - step] += np.uint64(1)
+        sa = np.argsort(key, kind="stable").astype(np.uint32)
+        key = key[sa]
+        ranks[0] = 0
+        np.cumsum(key[1:] != key[:-1], dtype=np.uint32, out=ranks[1:])
+        del key
+        rank[sa] = ranks
+        if rank[sa[-1]] == n - 1 or step >= n:
+            return sa
+        step *= 2
+
+
+class FMIndex:
+    def __init__(self, digits, base=10):
+        # Symbols are shifted by one to make room for the sentinel 0.
+        text = np.append(np.asarray(digits, dtype=np.uint8) + 1, np.uint8(0))
+        self.sigma = base + 1
+        # 4 bytes per digit for the suffix array, 1 for the BWT and 0.7 for the
+        # occurrence table
+        self.sa = suffix_array(text)
+        previous = self.sa - np.uint32(1)
+        previous[self.sa == 0] = len(text) - 1
+        self.bwt = text[previous]
+        del previous
+        counts = np.bincount(text, minlength=self.sigma)
+        self.first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        # occurrences of each symbol in bwt[: i * OCC_SAMPLE]
+        blocks = -(-len(text) // OCC_SAMPLE)
+        padded = np.full(blocks * OCC_SAMPLE, self.sigma, dtype=np.uint8)
+        padded[: len(text)] = self.bwt
+        padded = padded.reshape(blocks, OCC_SAMPLE)
+        self.checkpoints = np.zeros((blocks + 1, self.sigma), dtype=np.uint32)
+        for symbol in range(self.sigma):
+            np.cumsum(
+                np.count_nonzero(padded == symbol, axis=1),
+                out=self.checkpoints[1:, symbol],
+            )
+
+    def _occ(self, symbol, i):
+        block = i // OCC_SAMPLE
+        rest = self.bwt[block * OCC_SAMPLE : i]
+        return int(self.checkpoints[block, symbol]) + int(
+            np.count_nonzero(rest == symbol)
+        )
+
+    def interval(self, pattern):
+        # rows of the suffix array starting with `pattern`
+        lo, hi = 0, len(self.bwt)
+        for digit in reversed(pattern):
+            symbol = int(digit) + 1
+            lo = int(self.first[symbol]) + self._occ(symbol, lo)
+            hi = int(self.first[symbol]) + self._occ(symbol, hi)
+            if lo >= hi:
+                return 0, 0
+        return lo, hi
+
+    def count(self, pattern):
+        lo, hi = self.interval(pattern)
+        return hi - lo
+
+    def locate(self, pattern):
+        lo, hi = self.interval(pattern)
+        return np.sort(self.sa[lo:hi]).astype(np.int64)
+
+
+def _as_pattern(pattern):
+    if isinstance(pattern, str):
+        return np.frombuffer(pattern.encode("ascii"), dtype=np.uint8) - ord("0")
+    return np.asarray(pattern, dtype=np.uint8)
+
+
+class DigitIndex:
+    def __init__(self, max_pattern=64, segment_digits=SEGMENT_DIGITS, base=10):
+        self.max_pattern = max_pattern
+        self.segment_digits = segment_digits
+        self.base = base
+        self.digits = np.zeros(segment_digits, dtype=np.uint8)
+        self.length = 0
+        # (start, end, FMIndex over digits[start - overlap : end], overlap)
+        self.segments = []
+        self.indexed = 0
+
+    def __len__(self):
+        return self.length
+
+    def extend(self, digits):
+        digits = np.asarray(digits, dtype=np.uint8)
+        if self.length + len(digits) > len(self.digits):
+            grown = np.zeros(
+                max(2 * len(self.digits), self.length + len(digits)), np.uint8
+            )
+            grown[: self.length] = self.digits[: self.length]
+            self.digits = grown
+        self.digits[self.length : self.length + len(digits)] = digits
+        self.length += len(digits)
+        while self.length - self.indexed >= self.segment_digits:
+            self._add_segment(self.indexed, self.indexed + self.segment_digits)
+
+    def _build(self, start, end):
+        overlap = min(start, self.max_pattern - 1)
+        index = FMIndex(self.digits[start - overlap : end], self.base)
+        return start, end, index, overlap
+
+    def _add_segment(self, start, end):
+        self.indexed = end
+        self.segments.append(self._build(start, end))
+        # merge equal-sized neighbours, keeping O(log n) segments
+        while (
+            len(self.segments) >= 2
+            and self.segments[-1][1] - self.segments[-1][0]
+            == self.segments[-2][1] - self.segments[-2][0]
+        ):
+            right = self.segments.pop()
+            left = self.segments.pop()
+            self.segments.append(self._build(left[0], right[1]))
+
+    def locate(self, pattern, limit=None):
+        # Sorted start positions of `pattern` lying within the first `limit` digits
+        pattern = self._check(pattern)
+        m = len(pattern)
+        limit = self.length if limit is None else min(limit, self.length)
+
+        found = []
+        for start, end, index, overlap in self.segments:
+            if start - overlap >= limit:
+                break
+            positions = index.locate(pattern) + (start - overlap)
+            # occurrences inside the overlap belong to the previous segment
+            found.append(positions[positions + m > start])
+        tail_start = max(0, self.indexed - (m - 1))
+        found.append(
+            tail_start + _find_all(self.digits[tail_start : self.length], pattern)
+        )
+        positions = np.concatenate(found)
+        return np.sort(positions[positions + m <= limit])
+
+    def find(self, pattern, limit=None):
+        positions = self.locate(pattern, limit)
+        return int(positions[0]) if len(positions) else -1
+
+    def count(self, pattern, limit=None):
+        if limit is not None and limit < self.length:
+            return len(self.locate(pattern, limit))
+        # O(pattern length) per segment: no positions needed
+        pattern = self._check(pattern)
+        m = len(pattern)
+        total = 0
+        for start, _, index, overlap in self.segments:
+            total += index.count(pattern)
+            total -= len(_find_all(self.digits[start - overlap : start], pattern))
+        tail_start = max(0, self.indexed - (m - 1))
+        total += len(_find_all(self.digits[tail_start : self.length], pattern))
+        return total
+
+    def __contains__(self, pattern):
+        return self.count(pattern) > 0
+
+    def _check(self, pattern):
+        pattern = _as_pattern(pattern)
+        if not 0 < len(pattern) <= self.max_pattern:
+            raise ValueError(f"patterns must have 1 to {self.max_pattern} digits")
+        return pattern
+
+
+def _find_all(digits, pattern):
+    # naive search, for the short stretches outside the FM-indexes
+    haystack, needle = digits.tobytes(), pattern.tobytes()
+    positions = []
+    position = haystack.find(needle)
+    while position != -1:
+        positions.append(position)
+        position = haystack.find(needle, position + 1)
+    return np.array(positions, dtype=np.int64)
+
+
+def index_digits(source, n, chunk_digits=1 << 20, **kwargs):
+    # An index over the first n digits of a DigitStore or PiCache
+    index = DigitIndex(**kwargs)
+    for start in range(0, n, chunk_digits):
+        index.extend(source.array(start, min(n, start + chunk_digits)))
+    return index
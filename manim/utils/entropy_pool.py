@@ -0,0 +1,136 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# Seeds from the OS without waiting for it. `code/get_random_bits.py` (shown in
+# the video) calls os.getrandom(32, os.GRND_RANDOM), which can block while the
+# kernel thinks it is short on entropy. Here a background thread keeps a queue
+# of seeds filled, reading the blocking pool only in non-blocking mode and
+# falling back to the urandom pool when it has nothing. A caller finding the
+# queue empty reads the urandom pool directly, which does not block once the
+# system has booted.
+
+SEED_BYTES = 32
+
+
+def read_entropy(nbytes, random_pool=True):
+    # (bytes, fell back to urandom)
+    flags = getattr(os, "GRND_NONBLOCK", 0)
+    if not hasattr(os, "getrandom"):  # not Linux
+        return os.urandom(nbytes), not random_pool
+    if random_pool:
+        data = b""
+        try:
+            while len(data) < nbytes:
+                data += os.getrandom(nbytes - len(data), os.GRND_RANDOM | flags)
+            return data, False
+        except BlockingIOError:
+            pass
+    try:
+        return os.getrandom(nbytes, flags), True
+    except BlockingIOError:
+        return os.urandom(nbytes), True
+
+
+class EntropyPool:
+    def __init__(self, capacity=64, low_water=16, seed_bytes=SEED_BYTES):
+        self.capacity = capacity
+        self.low_water = low_water
+        self.seed_bytes = seed_bytes
+        self.seeds = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        # counters, see `stats`
+        self.served = 0
+        self.served_direct = 0
+        self.fallbacks = 0
+        self.refills = 0
+        self.blocked_seconds = 0.0
+        self.thread = threading.Thread(target=self._fill, daemon=True)
+        self.thread.start()
+
+    def _fill(self):
+        while True:
+            with self.condition:
+                while not self.closed and len(self.seeds) > self.low_water:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                missing = self.capacity - len(self.seeds)
+            # one read for the whole refill, outside the lock
+            data, fell_back = read_entropy(missing * self.seed_bytes)
+            with self.condition:
+                self.refills += 1
+                self.fallbacks += fell_back
+                for i in range(0, len(data), self.seed_bytes):
+                    self.seeds.append(data[i : i + self.seed_bytes])
+
+    def get_seed_nowait(self):
+        with self.condition:
+            self.served += 1
+            if self.seeds:
+                seed = self.seeds.popleft()
+                if len(self.seeds) <= self.low_water:
+                    self.condition.notify()
+                return seed
+            self.served_direct += 1
+        start = time.perf_counter()
+        seed, _ = read_entropy(self.seed_bytes, random_pool=False)
+        with self.condition:
+            self.blocked_seconds += time.perf_counter() - start
+        return seed
+
+    async def get_seed(self):
+        # from the queue if possible, else without blocking the event loop
+        with self.condition:
+            ready = bool(self.seeds)
+        if ready:
+            return self.get_seed_nowait()
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.get_seed_nowait
+        )
+
+    def seed(self, rng=random):
+        # rng.seed with a fresh seed, like `code/get_random_bits.py`
+        rng.seed(self.get_seed_nowait())
+
+    def stats(self):
+        with self.condition:
+            return {
+                "queued": len(self.seeds),
+                "served": self.served,
+                "served_direct": self.served_direct,
+                "refills": self.refills,
+                "fallbacks": self.fallbacks,
+                "blocked_seconds": self.blocked_seconds,
+            }
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_pool():
+    # started on first use, shared by the whole process
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EntropyPool()
+        return _pool
+
+
+async def get_seed():
+    return await default_pool().get_seed()
+
+
+def seed_random(rng=random):
+    default_pool().seed(rng)
@@ -0,0 +1,177 @@
+import functools
+
+import numpy as np
+from utils.modular import modulus
+from utils.polynomials import Add, Const, Mul, Pow, Var, parse, postorder, program
+
+# "Multiplying out" (`PolynomialsMultiplyingOut`): univariate polynomials are
+# expanded into dense coefficient vectors, modulo three NTT-friendly primes at
+# once, as (3, degree + 1) uint64 arrays with a row per prime. This is the
+# deterministic baseline for the random evaluation in `utils.polynomials`.
+#
+# Products use schoolbook multiplication when a factor is short and the
+# number-theoretic transform (NTT) otherwise. A power is one transform, a
+# pointwise power and one inverse transform. (Karatsuba was slower than both at
+# every size: with numpy, the NTT already wins from about 64 coefficients.)
+
+# p = c * 2^k + 1 with 3 a primitive root, so 2^k-th roots of unity exist;
+# the smallest k (23) limits transforms to 2^23 points.
+NTT_PRIMES = (998244353, 167772161, 469762049)
+MAX_NTT = 1 << 23
+SCHOOLBOOK = 32
+
+
+@functools.lru_cache(maxsize=None)
+def _bit_reverse(n):
+    bits = n.bit_length() - 1
+    index = np.arange(n)
+    reverse = np.zeros(n, dtype=np.intp)
+    for i in range(bits):
+        reverse |= ((index >> i) & 1) << (bits - 1 - i)
+    return reverse
+
+
+@functools.lru_cache(maxsize=None)
+def _twiddles(n, primes, invert):
+    # w^j for j < n / 2, w a primitive n-th root of unity (or its inverse)
+    rows = []
+    for p in primes:
+        w = pow(3, (p - 1) // n, p)
+        if invert:
+            w = pow(w, -1, p)
+        row = np.ones(max(1, n // 2), dtype=np.uint64)
+        filled = 1
+        while filled < n // 2:
+            step = min(filled, n // 2 - filled)
+            row[filled : filled + step] = row[:step] * np.uint64(pow(w, filled, p)) % p
+            filled += step
+        rows.append(row)
+    return np.array(rows)
+
+
+def ntt(a, primes, invert=False):
+    # a: (len(primes), n) residues, n a power of two; iterative Cooley-Tukey,
+    # each stage a few array operations over all butterflies and primes
+    k, n = a.shape
+    p = np.array(primes, dtype=np.uint64).reshape(-1, 1, 1)
+    twiddles = _twiddles(n, tuple(primes), invert)
+    a = a[:, _bit_reverse(n)]
+    half = 1
+    while half < n:
+        blocks = a.reshape(k, -1, 2 * half)
+        u = blocks[:, :, :half]
+        v = blocks[:, :, half:] * twiddles[:, None, :: n // (2 * half)] % p
+        s = u + v
+        np.subtract(s, p, out=s, where=s >= p)
+        d = u + (p - v)
+        np.subtract(d, p, out=d, where=d >= p)
+        a = np.concatenate([s, d], axis=2).reshape(k, n)
+        half *= 2
+    if invert:
+        n_inv = [pow(n, -1, q) for q in primes]
+        a = a * np.array(n_inv, dtype=np.uint64).reshape(-1, 1) % p[:, :, 0]
+    return a
+
+
+def _transform_size(length):
+    n = 1 << max(0, length - 1).bit_length()
+    if n > MAX_NTT:
+        raise ValueError(f"products of {length} coefficients exceed the NTT size")
+    return n
+
+
+def _pad(a, length):
+    out = np.zeros((a.shape[0], length), dtype=np.uint64)
+    out[:, : a.shape[1]] = a
+    return out
+
+
+def _schoolbook(a, b, field):
+    if a.shape[1] > b.shape[1]:
+        a, b = b, a
+    out = np.zeros((a.shape[0], a.shape[1] + b.shape[1] - 1), dtype=np.uint64)
+    for i in range(a.shape[1]):
+        window = out[:, i : i + b.shape[1]]
+        window[:] = field.add(window, field.mul(a[:, i : i + 1], b))
+    return out
+
+
+def multiply(a, b, primes=NTT_PRIMES):
+    # schoolbook costs (shorter length) x (product length), the NTT about
+    # 15 array passes over the product per stage
+    length = a.shape[1] + b.shape[1] - 1
+    if min(a.shape[1], b.shape[1]) <= SCHOOLBOOK:
+        return _schoolbook(a, b, modulus(tuple(primes)))
+    n = _transform_size(length)
+    product = modulus(tuple(primes)).mul(
+        ntt(_pad(a, n), primes), ntt(_pad(b, n), primes)
+    )
+    return ntt(product, primes, invert=True)[:, :length]
+
+
+def power(a, exponent, primes=NTT_PRIMES):
+    if exponent == 0:
+        return np.ones((len(primes), 1), dtype=np.uint64)
+    length = (a.shape[1] - 1) * exponent + 1
+    n = _transform_size(length)
+    values = modulus(tuple(primes)).pow(ntt(_pad(a, n), primes), exponent)
+    return ntt(values, primes, invert=True)[:, :length]
+
+
+def expand(expr, primes=NTT_PRIMES):
+    # Coefficients (constant term first) of a univariate expression or string
+    # for `parse`, one row per prime. The length is the degree bound plus one;
+    # leading coefficients may be zero after cancellation.
+    if isinstance(expr, str):
+        expr = parse(expr)
+    if len(program(expr).variables) > 1:
+        raise ValueError("only univariate polynomials can be expanded")
+    primes = tuple(primes)
+    field = modulus(primes)
+    coefficients = {}
+    for node in postorder(expr):
+        args = [coefficients[id(child)] for child in node.children()]
+        if isinstance(node, Var):
+            result = np.tile(np.array([0, 1], dtype=np.uint64), (len(primes), 1))
+        elif isinstance(node, Const):
+            result = field.constant(node.value)
+        elif isinstance(node, Add):
+            length = max(args[0].shape[1], args[1].shape[1])
+            result = field.add(_pad(args[0], length), _pad(args[1], length))
+        elif isinstance(node, Mul):
+            result = multiply(args[0], args[1], primes)
+        elif isinstance(node, Pow):
+            result = power(args[0], node.exponent, primes)
+        coefficients[id(node)] = result
+    return coefficients[id(expr)]
+
+
+def exact_coefficients(expr, primes=NTT_PRIMES):
+    # Integer coefficients by CRT; correct while they are below half the
+    # product of the primes in absolute value (about 2^85 for NTT_PRIMES).
+    return modulus(tuple(primes)).crt(expand(expr, primes), signed=True)
+
+
+def expanded_equal(lhs, rhs, primes=NTT_PRIMES):
+    # Equal coefficients modulo every prime. Unlike `identical`, no randomness,
+    # but integer coefficients differing by a multiple of all primes pass.
+    a, b = expand(lhs, primes), expand(rhs, primes)
+    length = max(a.shape[1], b.shape[1])
+    return bool(np.array_equal(_pad(a, length), _pad(b, length)))
+
+
+if __name__ == "__main__":
+    # python -m utils.expansion: expanding vs evaluating the identity of the scenes
+    import time
+
+    from utils.polynomials import identical
+
+    lhs = r"(x+1)^{10\,000}(x+2)^{20\,000}"
+    rhs = r"(x^3 + 5x^2 + 8x + 5)^{10\,000}"
+    for name, test in [
+        ("expand (NTT)", lambda: expanded_equal(lhs, rhs)),
+        ("evaluate at 1000 points", lambda: identical(lhs, rhs).equal),
+    ]:
+        start = time.perf_counter()
+        equal = test()
+        print(f"{name:24} {equal!s:6} {time.perf_counter() - start:8.4f} s")
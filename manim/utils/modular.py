@@ -0,0 +1,88 @@
+import functools
+
+import numpy as np
+
+# Arithmetic modulo several primes below 2^32 at once, on uint64 arrays of
+# shape (number of primes, ...): row i holds residues modulo primes[i]. A
+# product of two residues fits in 64 bits, so no big integers are involved
+# until `crt` reconstructs an exact value.
+#
+# Products are reduced with numpy's remainder, in place. Montgomery reduction
+# needs about eight array passes per product and measured 2-3x slower here.
+
+
+class Modulus:
+    def __init__(self, primes):
+        self.primes = tuple(int(p) for p in primes)
+        for p in self.primes:
+            if not 1 < p < 1 << 32:
+                raise ValueError(f"moduli must be below 2^32, got {p}")
+        self.p = np.array(self.primes, dtype=np.uint64).reshape(-1, 1)
+
+    def constant(self, value):
+        # an integer of any size and sign, one row per prime
+        return np.array([value % p for p in self.primes], np.uint64).reshape(-1, 1)
+
+    def reduce(self, values):
+        # integers of any size and sign, or arrays of them, one row per prime
+        values = np.asarray(values)
+        if values.dtype.kind in "bu":
+            return values.astype(np.uint64) % self.p
+        if values.dtype.kind == "i":
+            # numpy's remainder takes the sign of the divisor, as Python's does
+            return (values % self.p.astype(np.int64)).astype(np.uint64)
+        # Python ints beyond 64 bits (object arrays): Python's remainder
+        primes = np.array(self.primes, dtype=object).reshape(-1, 1)
+        return (values % primes).astype(np.uint64)
+
+    def add(self, a, b):
+        s = a + b
+        np.subtract(s, self.p, out=s, where=s >= self.p)
+        return s
+
+    def sub(self, a, b):
+        d = a + (self.p - b)
+        np.subtract(d, self.p, out=d, where=d >= self.p)
+        return d
+
+    def mul(self, a, b):
+        t = a * b
+        np.remainder(t, self.p, out=t)
+        return t
+
+    def pow(self, a, exponent):
+        # square-and-multiply
+        result = np.ones(np.broadcast(a, self.p).shape, dtype=np.uint64)
+        while exponent:
+            if exponent & 1:
+                result = self.mul(result, a)
+            exponent >>= 1
+            if exponent:
+                a = self.mul(a, a)
+        return result
+
+    def crt(self, residues, signed=False):
+        # Exact integers from their residues, as an object array without the
+        # prime axis. Garner's algorithm: the mixed radix digits c_i < p_i of
+        # x = c_0 + c_1 p_0 + c_2 p_0 p_1 + ... need word-sized arithmetic only.
+        residues = np.asarray(residues, dtype=np.uint64)
+        digits = []
+        for i, p in enumerate(self.primes):
+            p64 = np.uint64(p)
+            c = residues[i] % p64
+            for j, q in enumerate(self.primes[:i]):
+                # c_i = (r_i - c_0 - c_1 p_0 - ...) / (p_0 ... p_{i-1}) mod p_i
+                c = (c + p64 - digits[j] % p64) % p64 * np.uint64(pow(q, -1, p)) % p64
+            digits.append(c)
+        value = np.zeros(residues.shape[1:], dtype=object)
+        for c, p in zip(reversed(digits), reversed(self.primes)):
+            value = value * p + c.astype(object)
+        if signed:
+            product = np.prod(np.array(self.primes, dtype=object))
+            value = np.where(value > product // 2, value - product, value)
+        return value
+
+
+@functools.lru_cache(maxsize=None)
+def modulus(primes):
+    return Modulus(primes)
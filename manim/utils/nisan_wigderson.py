@@ -0,0 +1,188 @@
+import functools
+
+import numpy as np
+from utils.cache import atomic_write, cache_dir
+
+# The Nisan-Wigderson generator behind PRNG("NW").
+#
+# A combinatorial (m, l, a) design is a family of m subsets of the seed
+# positions, each of size l, any two sharing at most a positions. Output bit i
+# is a hard function f applied to the seed bits in subset i. With the index
+# matrix of the design (m x l), all output bits are one fancy-indexing step
+# plus one vectorized evaluation of f. In the code, l is spelled `ell`.
+#
+# Two designs:
+#  - build_design: graphs of polynomials over F_q, explicit, but with q >= ell
+#    the seed has ell * q = Theta(log^2 m) bits. PRNG("NW") uses (1024, 11, 2),
+#    a 121-bit seed, whose output passes the battery of stat_tests.py;
+#  - greedy_design: one position out of each of ell blocks of `block` positions,
+#    chosen greedily, so the seed has ell * block bits. This is a toy: a small
+#    enough seed to run on all of them (e.g. 24 bits for (1024, 8, 6) with
+#    blocks of 3) only leaves room for subsets sharing most of their positions,
+#    and the outputs are far from random.
+
+
+def _is_prime(q):
+    return q >= 2 and all(q % d for d in range(2, int(q**0.5) + 1))
+
+
+def design_field(m, ell, a):
+    # Smallest prime q >= ell with enough polynomials of degree <= a over F_q
+    q = max(ell, 2)
+    while not (_is_prime(q) and q ** (a + 1) >= m):
+        q += 1
+    return q
+
+
+def build_design(m, ell, a):
+    # Subset i is the graph {(x, p_i(x)) : x < ell} of the i-th polynomial of
+    # degree <= a over F_q. Two distinct polynomials agree on at most a points,
+    # so two subsets share at most a positions. Position (x, y) is x * q + y,
+    # so the seed has ell * q bits, at least ell^2.
+    q = design_field(m, ell, a)
+    coefficients = (np.arange(m)[:, None] // q ** np.arange(a + 1)) % q
+    x = np.arange(ell)
+    values = np.zeros((m, ell), dtype=np.int64)
+    for j in range(a, -1, -1):
+        values = (values * x + coefficients[:, j : j + 1]) % q
+    return (x * q + values).astype(np.int32), ell * q
+
+
+def greedy_design(m, ell, a, block, batch=4096, max_candidates=256):
+    # Subset i takes position x * block + c[x] from each block x, for a choice
+    # vector c; two subsets share the blocks where their choices agree. Random
+    # choice vectors (from a fixed seed, so the design is reproducible) are
+    # kept when they agree with every kept one in at most a blocks.
+    rng = np.random.default_rng(0)
+    choices = np.zeros((m, ell), dtype=np.uint8)
+    count = 0
+    for _ in range(max(1, max_candidates * m // batch)):
+        candidates = rng.integers(0, block, (batch, ell), dtype=np.uint8)
+        # drop the candidates clashing with the subsets kept so far, 256 at a time
+        for start in range(0, count, 256):
+            kept = choices[start : min(count, start + 256)]
+            agree = (candidates[:, None, :] == kept[None, :, :]).sum(axis=2)
+            candidates = candidates[agree.max(axis=1) <= a]
+        # and the survivors clashing with each other
+        for candidate in candidates:
+            if count and (choices[:count] == candidate).sum(axis=1).max() > a:
+                continue
+            choices[count] = candidate
+            count += 1
+            if count == m:
+                positions = np.arange(ell) * block + choices
+                return positions.astype(np.int32), ell * block
+    raise ValueError(f"no ({m}, {ell}, {a}) design found with blocks of {block}")
+
+
+@functools.lru_cache(maxsize=16)
+def design(m, ell, a, block=None):
+    # build_design, or greedy_design if `block` is given, memoized in this
+    # process and on disk. Cached designs are stored with the smallest integer
+    # type that fits and memory-mapped.
+    if block is None:
+        path = cache_dir("designs") / f"design_{m}_{ell}_{a}.npy"
+        seed_bits = ell * design_field(m, ell, a)
+    else:
+        path = cache_dir("designs") / f"greedy_{m}_{ell}_{a}_{block}.npy"
+        seed_bits = ell * block
+    if not path.exists():
+        if block is None:
+            index, _ = build_design(m, ell, a)
+        else:
+            index, _ = greedy_design(m, ell, a, block)
+        with atomic_write(path) as f:
+            np.save(f, index.astype(np.min_scalar_type(seed_bits - 1)))
+    return np.load(path, mmap_mode="r"), seed_bits
+
+
+############### HARD FUNCTIONS
+# Each takes an (m x ell) array of bits and returns m bits.
+
+
+def parity(bits):
+    return (bits.sum(axis=1, dtype=np.uint8) & 1).astype(np.uint8)
+
+
+def majority(bits):
+    return (2 * bits.sum(axis=1, dtype=np.int64) > bits.shape[1]).astype(np.uint8)
+
+
+def inner_product(bits):
+    # <x, y> mod 2 of the two halves, xor the middle bit if ell is odd. Only
+    # then is it balanced: with even ell, P(1) = (1 - 2^(-ell/2)) / 2.
+    half = bits.shape[1] // 2
+    value = parity(bits[:, :half] & bits[:, -half:])
+    if bits.shape[1] % 2:
+        value ^= bits[:, half]
+    return value
+
+
+def truth_table(table):
+    # f given by its truth table, indexed by the ell bits read as a binary number
+    table = np.asarray(table, dtype=np.uint8)
+
+    def f(bits):
+        weights = 1 << np.arange(bits.shape[-1] - 1, -1, -1, dtype=np.int64)
+        return table[bits.astype(np.int64) @ weights]
+
+    return f
+
+
+class NisanWigderson:
+    def __init__(self, m, ell, a=2, f=inner_product, block=None):
+        self.m = m
+        self.ell = ell
+        self.a = a
+        self.f = f
+        self.design, self.seed_bits = design(m, ell, a, block)
+        # native index type: numpy gathers about twice as fast as with int32
+        self.index = self.design.astype(np.intp)
+
+    def _seed_array(self, seed):
+        if isinstance(seed, (int, np.integer)):
+            seed = int(seed)
+            return np.array(
+                [(seed >> i) & 1 for i in range(self.seed_bits - 1, -1, -1)],
+                dtype=np.uint8,
+            )
+        if isinstance(seed, str):
+            seed = np.frombuffer(seed.encode("ascii"), dtype=np.uint8) - ord("0")
+        seed = np.asarray(seed, dtype=np.uint8)
+        if len(seed) != self.seed_bits:
+            raise ValueError(f"the seed needs {self.seed_bits} bits, got {len(seed)}")
+        return seed
+
+    def generate(self, seed):
+        # m output bits for a seed given as an int, a "0101" string or a bit array
+        return self.f(self._seed_array(seed).take(self.index))
+
+    def generate_many(self, seeds):
+        # (number of seeds) x m output bits, for a (number of seeds) x seed_bits
+        # array; f sees all the seeds' subsets stacked together.
+        seeds = np.asarray(seeds, dtype=np.uint8)
+        bits = seeds[:, self.index].reshape(-1, self.ell)
+        return self.f(bits).reshape(len(seeds), self.m)
+
+    def output_string(self, seed):
+        return (self.generate(seed) + ord("0")).tobytes().decode("ascii")
+
+
+if __name__ == "__main__":
+    # python -m utils.nisan_wigderson: output throughput against ordinary PRNGs
+    import random
+    import time
+
+    m = 1 << 20
+    generator = NisanWigderson(m, ell=29, a=3)
+    rng = np.random.default_rng(0)
+    seed = rng.integers(0, 2, generator.seed_bits, dtype=np.uint8)
+    for name, make_bits in [
+        (f"NW ({generator.seed_bits}-bit seed)", lambda: generator.generate(seed)),
+        ("numpy PCG64", lambda: rng.integers(0, 2, m, dtype=np.uint8)),
+        ("random.getrandbits", lambda: random.getrandbits(m)),
+    ]:
+        start = time.perf_counter()
+        make_bits()
+        elapsed = time.perf_counter() - start
+        print(f"{name:28} {m / elapsed / 1e6:10.1f} Mbit/s")
@@ -0,0 +1,256 @@
+import decimal
+import pickle
+from pathlib import Path
+
+import numpy as np
+from utils.cache import atomic_write, cache_dir
+from utils.stat_stream import read_digits
+
+try:
+    import gmpy2
+except ImportError:  # falls back to the decimal module, ~20x slower
+    gmpy2 = None
+
+# Decimal digits packed 4 bits each, two per byte (the first one in the high
+# nibble), after a 16-byte header: MAGIC and the number of digits.
+# The file is memory-mapped, so opening it costs the same for any length.
+
+MAGIC = b"DIGITS01"
+HEADER = 16
+
+
+def pack_digits(digits):
+    digits = np.asarray(digits, dtype=np.uint8)
+    if len(digits) % 2:
+        digits = np.append(digits, np.uint8(0))
+    return (digits[0::2] << 4) | digits[1::2]
+
+
+def unpack_digits(packed, start, stop):
+    # digits start..stop of the sequence whose first byte is `packed[0]`
+    packed = np.asarray(packed[start // 2 : (stop + 1) // 2])
+    digits = np.empty(2 * len(packed), dtype=np.uint8)
+    digits[0::2] = packed >> 4
+    digits[1::2] = packed & 0x0F
+    return digits[start % 2 : start % 2 + stop - start]
+
+
+def write_digit_file(path, chunks):
+    # `chunks` is an iterable of digit arrays
+    length = 0
+    odd = np.zeros(0, dtype=np.uint8)
+    with atomic_write(path) as f:
+        f.write(bytes(HEADER))
+        for chunk in chunks:
+            chunk = np.concatenate([odd, chunk])
+            even = len(chunk) // 2 * 2
+            pack_digits(chunk[:even]).tofile(f)
+            odd = chunk[even:]
+            length += even
+        pack_digits(odd).tofile(f)
+        length += len(odd)
+        f.seek(0)
+        f.write(MAGIC + length.to_bytes(8, "little"))
+    return Path(path)
+
+
+class DigitStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER)
+        if header[:8] != MAGIC:
+            raise ValueError(f"{self.path} is not a digit store")
+        self.length = int.from_bytes(header[8:], "little")
+        if self.length:
+            self.packed = np.memmap(
+                self.path,
+                dtype=np.uint8,
+                mode="r",
+                offset=HEADER,
+                shape=((self.length + 1) // 2,),
+            )
+        else:
+            self.packed = np.zeros(0, dtype=np.uint8)
+
+    @classmethod
+    def from_text(cls, text_path):
+        # "pi.txt" -> "pi.digits", rebuilt only when the text file is newer
+        text_path = Path(text_path)
+        path = text_path.with_suffix(".digits")
+        if not path.exists() or path.stat().st_mtime < text_path.stat().st_mtime:
+            with open(text_path, "rb") as f:
+                write_digit_file(path, read_digits(f, packed=False))
+        return cls(path)
+
+    def __len__(self):
+        return self.length
+
+    def array(self, start=0, stop=None):
+        start, stop, _ = slice(start, stop).indices(self.length)
+        return unpack_digits(self.packed, start, max(start, stop))
+
+    def __getitem__(self, key):
+        # Integers give a digit, slices a string, so that the store can stand in
+        # for the string of digits.
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError("only contiguous slices are supported")
+            digits = self.array(key.start, key.stop)
+            return (digits + ord("0")).tobytes().decode("ascii")
+        if key < 0:
+            key += self.length
+        if not 0 <= key < self.length:
+            raise IndexError("digit index out of range")
+        byte = int(self.packed[key // 2])
+        return byte >> 4 if key % 2 == 0 else byte & 0x0F
+
+
+############### COMPUTING PI
+
+CHUNK_DIGITS = 1_000_000
+GUARD_DIGITS = 20
+C3_OVER_24 = 640320**3 // 24
+BACKEND = "decimal" if gmpy2 is None else "gmpy2"
+EXACT = decimal.Context(
+    prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN
+)
+
+
+def _combine(left, right):
+    # P, Q, T of terms a..m-1 and m..b-1 into those of a..b-1
+    p_am, q_am, t_am = left
+    p_mb, q_mb, t_mb = right
+    return p_am * p_mb, q_am * q_mb, q_mb * t_am + p_am * t_mb
+
+
+def _binary_split(a, b, number):
+    # Chudnovsky series terms a..b-1 combined into P, Q, T
+    if b - a == 1:
+        if a == 0:
+            p = q = 1
+        else:
+            p = (6 * a - 5) * (2 * a - 1) * (6 * a - 1)
+            q = a * a * a * C3_OVER_24
+        t = p * (13591409 + 545140134 * a)
+        return number(p), number(q), number(-t if a % 2 else t)
+    m = (a + b) // 2
+    return _combine(_binary_split(a, m, number), _binary_split(m, b, number))
+
+
+def _terms(n):
+    # series terms for n digits; each adds ~14
+    return (n + GUARD_DIGITS) // 14 + 2
+
+
+def series(terms, prefix=None):
+    # (terms, P, Q, T) of terms 0..terms-1 or more; `prefix` is the result of
+    # an earlier call, which is extended instead of recomputed
+    number = decimal.Decimal if gmpy2 is None else gmpy2.mpz
+    with decimal.localcontext(EXACT):
+        if prefix is None:
+            return terms, *_binary_split(0, terms, number)
+        done, *triple = prefix
+        if done >= terms:
+            return prefix
+        return terms, *_combine(triple, _binary_split(done, terms, number))
+
+
+def compute_pi(n, split=None):
+    # The first n digits of pi ("3141..."), as a uint8 array; `split` is
+    # series(terms) for at least the terms n digits need
+    precision = n + GUARD_DIGITS
+    _, p, q, t = split or series(_terms(n))
+    if gmpy2 is not None:
+        one = gmpy2.mpz(10) ** precision
+        text = (q * 426880 * gmpy2.isqrt(10005 * one * one) // t).digits()
+    else:
+        ctx = decimal.Context(
+            prec=precision, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN
+        )
+        root = decimal.Decimal(10005).sqrt(ctx)
+        value = ctx.divide(ctx.multiply(ctx.multiply(q, 426880), root), t)
+        text = str(value).replace(".", "")
+    return np.frombuffer(text[:n].encode("ascii"), dtype=np.uint8) - ord("0")
+
+
+class PiCache:
+    # Digits of pi on demand, kept on disk as DigitStore chunks of CHUNK_DIGITS
+    # digits each, next to the binary splitting (P, Q, T) of the series terms
+    # summed so far. Growing the cache sums only the new terms and combines
+    # them with the stored ones; the square root and division at the end still
+    # cover all digits, so the cache grows at least twofold to amortize them.
+
+    def __init__(self, directory=None, chunk_digits=CHUNK_DIGITS):
+        self.directory = Path(directory) if directory else cache_dir("pi")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_digits = chunk_digits
+        self.chunks = {}
+
+    def _path(self, index):
+        return self.directory / f"pi_{self.chunk_digits}_{index:06d}.digits"
+
+    def _series_path(self):
+        # pickled mpz or Decimal, which the other backend cannot use
+        return self.directory / f"series_{BACKEND}.pickle"
+
+    def cached_chunks(self):
+        count = 0
+        while self._path(count).exists():
+            count += 1
+        return count
+
+    def ensure(self, n):
+        cached = self.cached_chunks()
+        needed = -(-n // self.chunk_digits)
+        if needed <= cached:
+            return
+        target = max(needed, 2 * cached)
+        terms = _terms(target * self.chunk_digits)
+        try:
+            prefix = pickle.loads(self._series_path().read_bytes())
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            prefix = None
+        split = series(terms, prefix)
+        if split is not prefix:
+            with atomic_write(self._series_path()) as f:
+                pickle.dump(split, f)
+        digits = compute_pi(target * self.chunk_digits, split)
+        for index in range(cached, target):
+            start = index * self.chunk_digits
+            chunk = digits[start : start + self.chunk_digits]
+            write_digit_file(self._path(index), [chunk])
+
+    def _chunk(self, index):
+        if index not in self.chunks:
+            self.chunks[index] = DigitStore(self._path(index))
+        return self.chunks[index]
+
+    def array(self, start, stop):
+        if stop <= start:
+            return np.zeros(0, dtype=np.uint8)
+        self.ensure(stop)
+        size = self.chunk_digits
+        pieces = []
+        for index in range(start // size, (stop - 1) // size + 1):
+            lo = max(start, index * size) - index * size
+            hi = min(stop, (index + 1) * size) - index * size
+            pieces.append(self._chunk(index).array(lo, hi))
+        return np.concatenate(pieces)
+
+    def __getitem__(self, key):
+        # Same conventions as DigitStore; there is no end, so slices need a stop
+        # and nothing counts from the end.
+        if isinstance(key, slice):
+            start = key.start or 0
+            if (
+                key.step not in (None, 1)
+                or key.stop is None
+                or min(start, key.stop) < 0
+            ):
+                raise ValueError("only bounded contiguous slices are supported")
+            digits = self.array(start, key.stop)
+            return (digits + ord("0")).tobytes().decode("ascii")
+        if key < 0:
+            raise IndexError("digit index out of range")
+        return int(self.array(key, key + 1)[0])
@@ -0,0 +1,467 @@
+import functools
+import hashlib
+import math
+import re
+from dataclasses import dataclass
+
+import numpy as np
+from utils.bit_sources import bit_source
+from utils.modular import modulus
+
+# Polynomial identity testing (`PolynomialsIntro2`): two polynomials given as
+# expression trees are evaluated at many random points modulo several primes,
+# all points and primes at once (see `utils.modular`).
+#
+# By the Schwartz-Zippel lemma a nonzero polynomial of degree d vanishes at a
+# uniformly random point of F_p^n with probability at most d / p.
+#
+# Expressions (built with operators, or parsed from the LaTeX in the scenes) are
+# compiled into straight-line programs: a list of additions and multiplications
+# where equal subexpressions appear once and powers are repeated squarings.
+# Programs are memoized by a hash of the expression.
+
+PRIMES = (4294967291, 4294967279)
+
+
+class Expr:
+    def __add__(self, other):
+        return Add(self, _wrap(other))
+
+    def __radd__(self, other):
+        return Add(_wrap(other), self)
+
+    def __sub__(self, other):
+        return Add(self, Mul(Const(-1), _wrap(other)))
+
+    def __rsub__(self, other):
+        return Add(_wrap(other), Mul(Const(-1), self))
+
+    def __neg__(self):
+        return Mul(Const(-1), self)
+
+    def __mul__(self, other):
+        return Mul(self, _wrap(other))
+
+    def __rmul__(self, other):
+        return Mul(_wrap(other), self)
+
+    def __pow__(self, exponent):
+        if not isinstance(exponent, int) or exponent < 0:
+            raise ValueError("exponents must be non-negative integers")
+        return Pow(self, exponent)
+
+    def children(self):
+        return ()
+
+    def variables(self):
+        return program(self).variables
+
+    def degree(self):
+        # total degree, an upper bound (cancellations are not detected)
+        return program(self).degree
+
+    def evaluate(self, point, p):
+        return program(self).evaluate(point, p)
+
+    def digest(self):
+        # structural hash, the key of the program cache
+        digests = {}
+        for node in postorder(self):
+            h = hashlib.blake2b(node._label().encode(), digest_size=16)
+            for child in node.children():
+                h.update(digests[id(child)])
+            digests[id(node)] = h.digest()
+        return digests[id(self)]
+
+
+class Var(Expr):
+    def __init__(self, name):
+        self.name = name
+
+    def _label(self):
+        return f"var {self.name}"
+
+    def _emit(self, builder, _):
+        return builder.emit("var", self.name)
+
+    def __repr__(self):
+        return self.name
+
+
+class Const(Expr):
+    def __init__(self, value):
+        self.value = int(value)
+
+    def _label(self):
+        return f"const {self.value}"
+
+    def _emit(self, builder, _):
+        return builder.emit("const", self.value)
+
+    def __repr__(self):
+        return str(self.value)
+
+
+class Add(Expr):
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def children(self):
+        return (self.left, self.right)
+
+    def _label(self):
+        return "add"
+
+    def _emit(self, builder, args):
+        return builder.emit("add", *sorted(args))
+
+    def __repr__(self):
+        return f"({self.left!r} + {self.right!r})"
+
+
+class Mul(Expr):
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def children(self):
+        return (self.left, self.right)
+
+    def _label(self):
+        return "mul"
+
+    def _emit(self, builder, args):
+        return builder.emit("mul", *sorted(args))
+
+    def __repr__(self):
+        return f"{self.left!r} * {self.right!r}"
+
+
+class Pow(Expr):
+    def __init__(self, base, exponent):
+        self.base = base
+        self.exponent = exponent
+
+    def children(self):
+        return (self.base,)
+
+    def _label(self):
+        return f"pow {self.exponent}"
+
+    def _emit(self, builder, args):
+        return builder.power(args[0], self.exponent)
+
+    def __repr__(self):
+        return f"({self.base!r})^{self.exponent}"
+
+
+def _wrap(value):
+    return value if isinstance(value, Expr) else Const(value)
+
+
+def postorder(root):
+    # children before parents, each node once; iterative, since products of
+    # thousands of factors make deep trees
+    seen = set()
+    order = []
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+        elif id(node) not in seen:
+            seen.add(id(node))
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children())
+    return order
+
+
+def symbols(names):
+    # x, y = symbols("x y")
+    return [Var(name) for name in names.split()]
+
+
+############### PARSING
+# The notation of the scenes: "(x^3 + 5x^2 + 8x + 5)^{10\,000}", "2\cdot x",
+# "(x+1)(x+2)", with implicit multiplication and {} as parentheses.
+
+TOKEN = re.compile(r"\s*(?:(\d+)|(\\cdot|\\times|[-+*^(){}])|([a-zA-Z](?:_\d+)?))")
+SPACING = re.compile(r"\$|\\left|\\right|\\[,;:! ]|\\quad|\{\}|_\{(\d+)\}")
+
+
+def parse(text):
+    # thin spaces between digits are thousands separators: 10\,000
+    text = re.sub(r"(?<=\d)\\,(?=\d)", "", text)
+    text = SPACING.sub(lambda m: f"_{m.group(1)}" if m.group(1) else "", text)
+    tokens = []
+    position = 0
+    while text[position:].strip():
+        match = TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"cannot parse {text[position:]!r}")
+        number, symbol, name = match.groups()
+        if number:
+            tokens.append(("number", int(number)))
+        elif symbol:
+            tokens.append(({"\\cdot": "*", "\\times": "*"}.get(symbol, symbol), None))
+        else:
+            tokens.append(("name", name))
+        position = match.end()
+    parser = _Parser(tokens)
+    expr = parser.expression()
+    if parser.peek() is not None:
+        raise ValueError(f"unexpected {parser.peek()!r} in {text!r}")
+    return expr
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i][0] if self.i < len(self.tokens) else None
+
+    def take(self, kind=None):
+        token = self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+        if kind is not None and token[0] != kind:
+            raise ValueError(f"expected {kind!r}, got {token[0]!r}")
+        self.i += 1
+        return token
+
+    def expression(self):
+        # term (+|- term)*
+        expr = self.term()
+        while self.peek() in ("+", "-"):
+            if self.take()[0] == "+":
+                expr = expr + self.term()
+            else:
+                expr = expr - self.term()
+        return expr
+
+    def term(self):
+        # [-] factor ([*] factor)*
+        if self.peek() == "-":
+            self.take()
+            return -self.term()
+        expr = self.factor()
+        while self.peek() in ("*", "number", "name", "(", "{"):
+            if self.peek() == "*":
+                self.take()
+            expr = expr * self.factor()
+        return expr
+
+    def factor(self):
+        # atom (^ exponent)*
+        expr = self.atom()
+        while self.peek() == "^":
+            self.take()
+            if self.peek() == "{":
+                self.take()
+                exponent = self.take("number")[1]
+                self.take("}")
+            else:
+                exponent = self.take("number")[1]
+            expr = expr**exponent
+        return expr
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == "number":
+            return Const(value)
+        if kind == "name":
+            return Var(value)
+        if kind in ("(", "{"):
+            expr = self.expression()
+            self.take(")" if kind == "(" else "}")
+            return expr
+        raise ValueError(f"unexpected {kind!r}")
+
+
+############### STRAIGHT-LINE PROGRAMS
+
+
+class _Builder:
+    def __init__(self):
+        self.instructions = []
+        self.registers = {}  # instruction -> register, for sharing
+        self.powers = {}  # (register, exponent) -> register
+
+    def emit(self, *instruction):
+        if instruction not in self.registers:
+            self.registers[instruction] = len(self.instructions)
+            self.instructions.append(instruction)
+        return self.registers[instruction]
+
+    def power(self, base, exponent):
+        # Square-and-multiply with every intermediate power remembered, so that
+        # (x+1)^10000 and (x+1)^20000 share all but one squaring.
+        if exponent == 0:
+            return self.emit("const", 1)
+        if exponent == 1:
+            return base
+        if (base, exponent) not in self.powers:
+            half = self.power(base, exponent // 2)
+            result = self.emit("mul", half, half)
+            if exponent % 2:
+                result = self.emit("mul", *sorted((result, base)))
+            self.powers[base, exponent] = result
+        return self.powers[base, exponent]
+
+
+class Program:
+    def __init__(self, expr):
+        builder = _Builder()
+        registers = {}
+        for node in postorder(expr):
+            args = [registers[id(child)] for child in node.children()]
+            registers[id(node)] = node._emit(builder, args)
+        self.instructions = builder.instructions
+        self.output = registers[id(expr)]
+
+        self.variables = sorted(
+            {arg for op, arg, *_ in self.instructions if op == "var"}
+        )
+        degrees = []
+        for op, *args in self.instructions:
+            if op == "var":
+                degrees.append(1)
+            elif op == "const":
+                degrees.append(0)
+            elif op == "add":
+                degrees.append(max(degrees[args[0]], degrees[args[1]]))
+            else:
+                degrees.append(degrees[args[0]] + degrees[args[1]])
+        self.degree = degrees[self.output]
+
+        # registers no longer needed after each instruction, to free memory
+        last_use = {}
+        for i, (op, *args) in enumerate(self.instructions):
+            if op in ("add", "mul"):
+                for arg in args:
+                    last_use[arg] = i
+        self.release = [[] for _ in self.instructions]
+        for register, i in last_use.items():
+            if register != self.output:
+                self.release[i].append(register)
+
+    def __len__(self):
+        return len(self.instructions)
+
+    def evaluate(self, point, p):
+        # `point` maps variable names to integers or arrays. `p` is a prime or a
+        # tuple of primes; then the result has one row per prime, and so may
+        # the values in `point`.
+        primes = tuple(p) if isinstance(p, (tuple, list)) else (p,)
+        field = modulus(primes)
+        shape = np.broadcast_shapes(*(np.shape(value) for value in point.values()))
+        point = {name: field.reduce(value) for name, value in point.items()}
+        values = [None] * len(self.instructions)
+        for i, (op, *args) in enumerate(self.instructions):
+            if op == "var":
+                values[i] = point[args[0]]
+            elif op == "const":
+                values[i] = field.constant(args[0])
+            elif op == "add":
+                values[i] = field.add(values[args[0]], values[args[1]])
+            else:
+                values[i] = field.mul(values[args[0]], values[args[1]])
+            for register in self.release[i]:
+                values[register] = None
+        result = values[self.output]
+        if isinstance(p, (tuple, list)):
+            return result
+        return np.broadcast_to(result[0], shape) if shape else result[0, 0]
+
+
+_PROGRAMS = {}
+
+
+def program(expr):
+    # the compiled program of an Expr or of a string for `parse`
+    if isinstance(expr, str):
+        return _program_from_text(expr)
+    key = expr.digest()
+    if key not in _PROGRAMS:
+        _PROGRAMS[key] = Program(expr)
+    return _PROGRAMS[key]
+
+
+@functools.lru_cache(maxsize=1024)
+def _program_from_text(text):
+    return program(parse(text))
+
+
+############### IDENTITY TESTING
+
+
+@dataclass(frozen=True)
+class IdentityResult:
+    equal: bool
+    points: int
+    primes: tuple
+    degree: int
+    # log2 of the probability that different polynomials pass all points,
+    # assuming their difference is nonzero modulo each prime (true for all but
+    # the finitely many primes dividing all its coefficients). 0 = no bound.
+    log2_error: float
+    # a point where the two sides differ, (prime, {variable: value})
+    witness: tuple = None
+
+    @property
+    def error_bound(self):
+        return 2.0**self.log2_error
+
+
+def random_points(variables, count, primes, source):
+    # for each variable, one row of `count` residues per prime
+    return {
+        name: np.stack([source.integers(count, p) for p in primes])
+        for name in variables
+    }
+
+
+def identical(lhs, rhs, points=1000, primes=PRIMES, source=None):
+    # lhs and rhs are expressions, strings for `parse` or integers. The points
+    # come from `source`, a bit source or its name (see `utils.bit_sources`).
+    lhs, rhs = (
+        program(_wrap(side) if isinstance(side, int) else side) for side in (lhs, rhs)
+    )
+    source = bit_source(source)
+    variables = sorted(set(lhs.variables) | set(rhs.variables))
+    degree = max(lhs.degree, rhs.degree)
+    primes = tuple(primes)
+
+    point = random_points(variables, points, primes, source)
+    differ = np.argwhere(lhs.evaluate(point, primes) != rhs.evaluate(point, primes))
+    if len(differ):
+        row, i = differ[0]
+        witness = (
+            primes[row],
+            {name: int(value[row, i]) for name, value in point.items()},
+        )
+        return IdentityResult(False, points, primes, degree, 0.0, witness)
+    log2_error = 0.0
+    for p in primes:
+        if degree < p:
+            log2_error += points * (math.log2(degree / p) if degree else -math.inf)
+    return IdentityResult(True, points, primes, degree, log2_error)
+
+
+class IdentityTester:
+    # The algorithm in the `Algo` box: the input "lhs \overset{?}{=} rhs" as in
+    # the scenes, the random bits from a bit source; outputs "=" or "$\ne$".
+    def __init__(self, source=None, points=1, primes=PRIMES[:1]):
+        self.source = bit_source(source)
+        self.points = points
+        self.primes = primes
+        self.last = None
+
+    def __call__(self, text):
+        text = text.replace("{{", "").replace("}}", "")
+        sides = re.split(r"\\overset\{\?\}\{=\}|=", text)
+        if len(sides) != 2:
+            raise ValueError(f"expected one (in)equality, got {text!r}")
+        self.last = identical(*sides, self.points, self.primes, self.source)
+        return "=" if self.last.equal else r"$\ne$"
@@ -0,0 +1,182 @@
+import functools
+import json
+import time
+
+import manim.mobject.text.tex_mobject as tex_mobject
+from manim._config import config
+from manim.mobject.svg.svg_mobject import SVGMobject
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene import Scene
+from manim.scene.scene_file_writer import SceneFileWriter
+from utils.cache import atomic_write, cache_dir
+
+# Where the render time of a scene goes, per play/wait call. Opt in with
+#
+#     SCENE_PROFILE=1 manim -ql prng.py BPP      (or render_all.py --profile)
+#
+# Each play is split into
+#   construction   compile_animation_data, begin_animations
+#   interpolation  update_to_time: animations, updaters
+#   rasterization  drawing frames with cairo
+#   encoding       passing frames to the video encoder
+#   tex, svg       LaTeX and SVG parsing (Tex built inside an animation)
+#   other          the rest of the play
+# and the time spent in construct() before it ("before": python, tex, svg).
+# Phases count their own time only. The report goes to
+# cache/profile/<Scene>.<quality>.json, next to a .folded file of collapsed
+# stacks for flamegraph.pl or speedscope.
+
+PHASES = [
+    (Scene, "compile_animation_data", "construction"),
+    (Scene, "begin_animations", "construction"),
+    (Scene, "update_to_time", "interpolation"),
+    (CairoRenderer, "update_frame", "rasterization"),
+    (SceneFileWriter, "write_frame", "encoding"),
+    (CairoRenderer, "scene_finished", "encoding"),
+    (SVGMobject, "init_svg_mobject", "svg"),
+]
+
+_current = None  # the SceneProfile of the scene being rendered
+
+
+class SceneProfile:
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+        self.after = {}  # after the last call, e.g. combining the movie
+        self.phases = {}  # since the end of the previous call
+        self.stack = []  # [phase, start, seconds of nested phases]
+        self.last = time.perf_counter()
+
+    def enter(self, phase):
+        self.stack.append([phase, time.perf_counter(), 0.0])
+
+    def exit(self):
+        phase, start, nested = self.stack.pop()
+        seconds = time.perf_counter() - start
+        if self.stack:
+            self.stack[-1][2] += seconds
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds - nested
+
+    def take_phases(self, seconds):
+        # the phases so far, with the unaccounted time as "python"
+        phases, self.phases = self.phases, {}
+        phases["python"] = seconds - sum(phases.values())
+        return phases
+
+    def record(self, scene, start, before, phases):
+        end = time.perf_counter()
+        self.last = end
+        family = [m for mob in scene.mobjects for m in mob.get_family()]
+        animations = [type(a).__name__ for a in scene.animations or []]
+        self.calls.append(
+            {
+                "kind": "wait" if animations == ["Wait"] else "play",
+                "animations": animations,
+                "run_time": getattr(scene, "duration", None),
+                "seconds": end - start,
+                "phases": phases,
+                "before": before,
+                "mobjects": len(family),
+                "points": sum(len(m.points) for m in family),
+            }
+        )
+
+    def report(self):
+        totals = {}
+        for phases in self._all_phases():
+            for phase, seconds in phases.items():
+                totals[phase] = totals.get(phase, 0.0) + seconds
+        return {
+            "scene": self.name,
+            "totals": totals,
+            "calls": self.calls,
+            "after": self.after,
+        }
+
+    def _all_phases(self):
+        for call in self.calls:
+            yield call["phases"]
+            yield call["before"]
+        yield self.after
+
+    def folded(self):
+        lines = []
+        for i, call in enumerate(self.calls):
+            frame = f"{call['kind']} {i} {','.join(call['animations'])}"
+            for stack, phases in (
+                (f"{self.name};{frame}", call["phases"]),
+                (f"{self.name};construct;before {i}", call["before"]),
+            ):
+                for phase, seconds in phases.items():
+                    if seconds > 0:
+                        lines.append(f"{stack};{phase} {round(seconds * 1e6)}")
+        for phase, seconds in self.after.items():
+            if seconds > 0:
+                lines.append(f"{self.name};after;{phase} {round(seconds * 1e6)}")
+        return "\n".join(lines) + "\n"
+
+    def save(self):
+        name = f"{self.name}.{config.pixel_height}p{config.frame_rate:g}"
+        directory = cache_dir("profile")
+        with atomic_write(directory / f"{name}.json") as f:
+            f.write(json.dumps(self.report(), indent=1).encode())
+        with atomic_write(directory / f"{name}.folded") as f:
+            f.write(self.folded().encode())
+
+
+def _timed(phase, function):
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        if _current is None:
+            return function(*args, **kwargs)
+        _current.enter(phase)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current.exit()
+
+    return timed
+
+
+def _profile_play(play):
+    @functools.wraps(play)
+    def profiled(scene, *args, **kwargs):
+        profile = _current
+        if profile is None or profile.stack:
+            return play(scene, *args, **kwargs)
+        start = time.perf_counter()
+        before = profile.take_phases(start - profile.last)
+        profile.enter("other")
+        try:
+            play(scene, *args, **kwargs)
+        finally:
+            profile.exit()
+            phases = profile.phases
+            profile.phases = {}
+            profile.record(scene, start, before, phases)
+
+    return profiled
+
+
+def _profile_render(render):
+    @functools.wraps(render)
+    def profiled(scene, *args, **kwargs):
+        global _current
+        _current = SceneProfile(type(scene).__name__)
+        try:
+            return render(scene, *args, **kwargs)
+        finally:
+            profile, _current = _current, None
+            profile.after = profile.take_phases(time.perf_counter() - profile.last)
+            profile.save()
+
+    return profiled
+
+
+def install_profiler():
+    for cls, method, phase in PHASES:
+        setattr(cls, method, _timed(phase, getattr(cls, method)))
+    tex_mobject.tex_to_svg_file = _timed("tex", tex_mobject.tex_to_svg_file)
+    Scene.play = _profile_play(Scene.play)
+    Scene.render = _profile_render(Scene.render)
@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+from utils.bit_sources import BitSource
+
+# n random bits in one call instead of n calls of random.randint(0, 1). The bits
+# are stored packed, most significant first, padded to whole 64-bit words, so
+# `words` is a view; the unpacked bits are computed once and `bools` is a view
+# of them. As an array (np.asarray, `utils.stat_tests`) the bits are 0/1 digits.
+
+
+class RandomBits:
+    def __init__(self, packed, n):
+        self.n = n
+        self.packed = packed
+        self._bits = None
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def bytes(self):
+        return self.packed[: -(-self.n // 8)]
+
+    @property
+    def words(self):
+        # big-endian, so that bit 0 is the top bit of words[0]
+        return self.packed.view(">u8")
+
+    @property
+    def bits(self):
+        if self._bits is None:
+            self._bits = np.unpackbits(self.packed, count=self.n)
+        return self._bits
+
+    @property
+    def bools(self):
+        return self.bits.view(bool)
+
+    @property
+    def string(self):
+        # "0101..."
+        return (self.bits + ord("0")).tobytes().decode("ascii")
+
+    def __str__(self):
+        return self.string
+
+    def __array__(self, dtype=None, copy=None):
+        return self.bits if dtype is None else self.bits.astype(dtype)
+
+
+def random_bits(n, rng=random):
+    # `rng`: a random.Random (or the `random` module, seeded in util_general so
+    # that renders repeat), a numpy Generator, or a bit source
+    nbytes = -(-n // 64) * 8
+    if isinstance(rng, BitSource):
+        packed = np.array(rng.read(nbytes), dtype=np.uint8)
+    elif isinstance(rng, np.random.Generator):
+        packed = np.frombuffer(bytearray(rng.bytes(nbytes)), dtype=np.uint8)
+    else:
+        value = rng.getrandbits(8 * nbytes) if nbytes else 0
+        packed = np.frombuffer(bytearray(value.to_bytes(nbytes, "big")), np.uint8)
+    # clear the padding, so that `words` does not depend on it
+    tail = n % 8
+    if tail:
+        packed[n // 8] &= (0xFF << (8 - tail)) & 0xFF
+    packed[-(-n // 8) :] = 0
+    return RandomBits(packed, n)
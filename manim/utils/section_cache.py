@@ -0,0 +1,200 @@
+import hashlib
+import json
+import random
+import types
+
+import numpy as np
+from manim._config import config, logger
+from manim.animation.animation import Animation
+from manim.mobject.mobject import Mobject, _AnimationBuilder
+from manim.scene.scene import Scene
+from manim.scene.section import DefaultSectionType
+from utils.cache import atomic_write, cache_dir
+
+# Incremental rendering of scenes split with self.next_section(...):
+#
+#     class Pi(SectionCache, Scene):
+#
+# Every play (and wait) gets a key chaining the key of the previous one with
+# the state of all mobjects on screen, the animations with their arguments and
+# the code of their update functions; next_section mixes in the section name,
+# its skip_animations flag and the state at its start. A play whose key is
+# recorded from an earlier render of the same scene and quality, and whose movie
+# segment still exists, is only run to its end state and the recorded segment
+# is reused; plays that manim skips (skip_animations sections, -n) stay skipped. Since the keys
+# chain, the first edited play and everything after it render again, while
+# earlier sections (e.g. the opening funnel grid of `Pi`) do not. This also
+# skips manim's own per-play hash, which serializes every mobject to JSON.
+#
+# Assets enter through the mobjects: Tex/SVG geometry as points, images as
+# pixel arrays. Other objects enter through their repr, or their attributes if
+# they have no repr of their own; a play with an argument that has neither
+# renders normally, and so does everything after it.
+
+STYLE = (
+    "fill_rgbas",
+    "stroke_rgbas",
+    "background_stroke_rgbas",
+    "stroke_width",
+    "background_stroke_width",
+    "z_index",
+    "pixel_array",
+)
+MAX_DEPTH = 4  # how far to follow function closures and attributes
+
+
+class _Unhashable(Exception):
+    pass
+
+
+def _update(h, value, depth=0):
+    if isinstance(value, np.ndarray):
+        h.update(f"{value.dtype}{value.shape}".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, Mobject):
+        for mob in value.get_family():
+            h.update(type(mob).__name__.encode())
+            _update(h, mob.points)
+            for attr in STYLE:
+                _update(h, getattr(mob, attr, None))
+            if depth < MAX_DEPTH:
+                _update(h, mob.updaters, depth + 1)
+    elif isinstance(value, Animation):
+        h.update(type(value).__name__.encode())
+        for name, attr in sorted(vars(value).items()):
+            h.update(name.encode())
+            _update(h, attr, depth)
+    elif isinstance(value, _AnimationBuilder):
+        # mob.animate...: where the mobject goes and the play arguments
+        h.update(b"animate")
+        _update(h, [value.mobject, value.mobject.target, value.anim_args], depth)
+        _update(h, value.overridden_animation, depth)
+    elif isinstance(value, Scene):
+        # e.g. in the closure of an updater; its mobjects are in the key
+        h.update(type(value).__name__.encode())
+    elif isinstance(value, random.Random):
+        _update(h, value.getstate(), depth)
+    elif isinstance(value, np.random.Generator):
+        _update(h, value.bit_generator.state, depth)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _update(h, item, depth)
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            h.update(str(key).encode())
+            _update(h, value[key], depth)
+    elif isinstance(value, types.MethodType):
+        _update(h, value.__func__, depth)
+    elif isinstance(value, types.FunctionType):
+        code = value.__code__
+        h.update(code.co_code)
+        h.update(repr(code.co_consts).encode())
+        if depth < MAX_DEPTH:
+            _update(h, value.__defaults__, depth + 1)
+            for cell in value.__closure__ or ():
+                _update(h, cell.cell_contents, depth + 1)
+    elif isinstance(value, (bool, int, float, str, bytes, type(None))):
+        h.update(repr(value).encode())
+    elif type(value).__repr__ is not object.__repr__:
+        # e.g. ManimColor, enums, numpy scalars; not a repr with an address
+        text = repr(value)
+        if " at 0x" in text:
+            raise _Unhashable(text)
+        h.update(text.encode())
+    elif hasattr(value, "__dict__") and depth < MAX_DEPTH:
+        h.update(type(value).__name__.encode())
+        _update(h, vars(value), depth + 1)
+    else:
+        raise _Unhashable(type(value).__name__)
+
+
+class SectionCache:
+    # mixin, listed before Scene or MovingCameraScene
+    def setup(self):
+        super().setup()
+        quality = f"{config.pixel_height}p{config.frame_rate:g}"
+        self.section_file = (
+            cache_dir("sections") / f"{type(self).__name__}.{quality}.json"
+        )
+        try:
+            self.recorded_segments = json.loads(self.section_file.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.recorded_segments = {}
+        self.segments = {}
+        self.section_key = f"{type(self).__name__}.{quality}"
+
+    def _chain(self, *values):
+        # None from the first value that cannot be hashed on
+        if self.section_key is None:
+            return None
+        h = hashlib.blake2b(self.section_key.encode(), digest_size=16)
+        try:
+            _update(h, [*self.mobjects, getattr(self.camera, "frame", None), *values])
+        except _Unhashable as error:
+            logger.info("Not reusing segments from here on, cannot hash %s", error)
+            self.section_key = None
+        else:
+            self.section_key = h.hexdigest()
+        return self.section_key
+
+    def next_section(
+        self, name="unnamed", type=DefaultSectionType.NORMAL, skip_animations=False
+    ):
+        self._chain("section", name, skip_animations)
+        super().next_section(name, type, skip_animations)
+
+    def _skipping(self):
+        # whether the renderer will skip the next play, decided as in
+        # CairoRenderer.update_skipping_status; renderer.skip_animations is
+        # still that of the previous play
+        renderer = self.renderer
+        plays = renderer.num_plays
+        return bool(
+            renderer._original_skipping_status
+            or renderer.file_writer.sections[-1].skip_animations
+            or config.save_last_frame
+            or (config.from_animation_number and plays < config.from_animation_number)
+            or (config.upto_animation_number and plays > config.upto_animation_number)
+        )
+
+    def play(self, *args, **kwargs):
+        renderer = self.renderer
+        key = self._chain(args, kwargs)
+        segment = self.recorded_segments.get(key)
+        if (
+            segment is None
+            or not hasattr(renderer, "_original_skipping_status")
+            or self._skipping()
+            or not renderer.file_writer.is_already_cached(segment)
+        ):
+            super().play(*args, **kwargs)
+            segment = renderer.animations_hashes[-1]
+            if (
+                key is not None
+                and segment is not None
+                and not segment.startswith("uncached")
+            ):
+                self.segments[key] = segment
+            return
+
+        # run to the end state without rendering, then put the recorded
+        # segment where the renderer left a placeholder
+        skipping = renderer._original_skipping_status
+        renderer._original_skipping_status = True
+        try:
+            super().play(*args, **kwargs)
+        finally:
+            renderer._original_skipping_status = skipping
+        file_writer = renderer.file_writer
+        if file_writer.partial_movie_files[-1:] == [None]:
+            file_writer.partial_movie_files.pop()
+            file_writer.sections[-1].partial_movie_files.pop()
+            file_writer.add_partial_movie_file(segment)
+        renderer.animations_hashes[-1] = segment
+        self.segments[key] = segment
+
+    def tear_down(self):
+        super().tear_down()
+        # only what this render used, so that stale keys do not pile up
+        with atomic_write(self.section_file) as f:
+            f.write(json.dumps(self.segments, indent=1).encode())
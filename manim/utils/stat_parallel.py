@@ -0,0 +1,78 @@
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from utils.stat_tests import as_digits, battery
+
+# Runs the battery from `utils.stat_tests` on shards of a long input in a pool of
+# processes. Shard lengths are multiples of every test's block size, and the
+# per-shard statistics are merged in input order, so the results are exactly
+# those of a single-threaded run.
+
+SHARD_DIGITS = 1 << 24
+
+
+def _count(tests, digits):
+    return [test.count(digits) for test in tests]
+
+
+def _count_file_shard(tests, path, offset, size):
+    packed = np.fromfile(path, dtype=np.uint8, count=size, offset=offset)
+    return _count(tests, np.unpackbits(packed))
+
+
+def _alignment(tests, unit=1):
+    return math.lcm(unit, *(test.block for test in tests))
+
+
+def _merge_in_order(tests, executor, jobs, max_pending):
+    # At most `max_pending` shards are in flight, which bounds memory when
+    # the statistics are large (the k = 24 serial test has 128 MB of counts).
+    empty = np.zeros(0, dtype=np.uint8)
+    states = _count(tests, empty)
+    pending = deque()
+    for job in jobs:
+        pending.append(executor.submit(*job))
+        if len(pending) >= max_pending:
+            for i, stats in enumerate(pending.popleft().result()):
+                states[i] = tests[i].merge(states[i], stats)
+    while pending:
+        for i, stats in enumerate(pending.popleft().result()):
+            states[i] = tests[i].merge(states[i], stats)
+    return {test.name: test.finish(state) for test, state in zip(tests, states)}
+
+
+def run_parallel(data, base=2, tests=None, workers=None, shard_digits=SHARD_DIGITS):
+    digits = as_digits(data, base)
+    if tests is None:
+        tests = battery(base)
+    workers = workers or os.cpu_count()
+    alignment = _alignment(tests)
+    shard = max(alignment, shard_digits // alignment * alignment)
+
+    jobs = (
+        (_count, tests, digits[start : start + shard])
+        for start in range(0, len(digits), shard)
+    )
+    with ProcessPoolExecutor(workers) as executor:
+        return _merge_in_order(tests, executor, jobs, 2 * workers)
+
+
+def run_file_parallel(path, tests=None, workers=None, shard_digits=SHARD_DIGITS):
+    # `path` holds packed bits, like `run_file(path, packed=True)` in
+    # `utils.stat_stream`. Workers read their own shards from disk.
+    if tests is None:
+        tests = battery(2)
+    workers = workers or os.cpu_count()
+    alignment = _alignment(tests, unit=8)
+    shard = max(alignment, shard_digits // alignment * alignment) // 8
+
+    total = os.path.getsize(path)
+    jobs = (
+        (_count_file_shard, tests, path, offset, min(shard, total - offset))
+        for offset in range(0, total, shard)
+    )
+    with ProcessPoolExecutor(workers) as executor:
+        return _merge_in_order(tests, executor, jobs, 2 * workers)
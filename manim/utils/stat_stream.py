@@ -0,0 +1,108 @@
+import argparse
+import math
+import sys
+
+import numpy as np
+from utils.stat_tests import FrequencyTest, SerialTest, battery
+
+# Runs the tests from `utils.stat_tests` over streams that do not fit in memory.
+# Only the sufficient statistics of each test and fewer than `alignment` digits
+# are kept between chunks, and the results are identical to running the tests
+# on the whole input at once.
+
+CHUNK_BYTES = 1 << 20
+
+
+class StreamingBattery:
+    def __init__(self, tests):
+        self.tests = list(tests)
+        self.alignment = math.lcm(*(test.block for test in self.tests))
+        empty = np.zeros(0, dtype=np.uint8)
+        self.states = [test.count(empty) for test in self.tests]
+        self.carry = empty
+        self.length = 0
+
+    def _feed(self, digits):
+        for i, test in enumerate(self.tests):
+            self.states[i] = test.merge(self.states[i], test.count(digits))
+
+    def update(self, digits):
+        self.length += len(digits)
+        if len(self.carry):
+            digits = np.concatenate([self.carry, digits])
+        cut = len(digits) - len(digits) % self.alignment
+        self.carry = np.array(digits[cut:])
+        self._feed(digits[:cut])
+
+    def finish(self):
+        # The last piece may end in the middle of a block; the block tests drop
+        # the incomplete group, as they do on a whole buffer.
+        self._feed(self.carry)
+        self.carry = self.carry[:0]
+        return {
+            test.name: test.finish(state)
+            for test, state in zip(self.tests, self.states)
+        }
+
+
+def read_digits(stream, packed=True, chunk_bytes=CHUNK_BYTES):
+    # `packed`: raw bytes, 8 bits each, most significant first. Otherwise ASCII
+    # digits; anything else (whitespace, the dot in "3.14") is skipped.
+    buffer = bytearray(chunk_bytes)
+    view = memoryview(buffer)
+    while True:
+        size = stream.readinto(buffer)
+        if not size:
+            return
+        chunk = np.frombuffer(view[:size], dtype=np.uint8)
+        if packed:
+            yield np.unpackbits(chunk)
+        else:
+            chunk = chunk - ord("0")
+            yield chunk[chunk < 10]
+
+
+def run_stream(stream, base=2, packed=True, tests=None, chunk_bytes=CHUNK_BYTES):
+    if packed and base != 2:
+        raise ValueError("packed input is always bits")
+    if tests is None:
+        tests = battery(base)
+    engine = StreamingBattery(tests)
+    for digits in read_digits(stream, packed, chunk_bytes):
+        if base < 10 and len(digits) and digits.max() >= base:
+            raise ValueError(f"digit {digits.max()} out of range for base {base}")
+        engine.update(digits)
+    return engine.finish()
+
+
+def run_file(path, base=2, packed=True, tests=None, chunk_bytes=CHUNK_BYTES):
+    with open(path, "rb", buffering=0) as f:
+        return run_stream(f, base, packed, tests, chunk_bytes)
+
+
+if __name__ == "__main__":
+    # python -m utils.stat_stream bits.bin
+    # cat pi.txt | python -m utils.stat_stream --ascii --base 10 -
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file", help="input file, - for stdin")
+    parser.add_argument("--base", type=int, default=2)
+    parser.add_argument("--ascii", action="store_true", help="input is ASCII digits")
+    parser.add_argument(
+        "--scene",
+        action="store_true",
+        help="only the two tests from `StatisticalTest` (#0 : #1 and bigrams)",
+    )
+    args = parser.parse_args()
+
+    tests = None
+    if args.scene:
+        tests = [FrequencyTest(args.base), SerialTest(args.base, k=2)]
+    if args.file == "-":
+        results = run_stream(sys.stdin.buffer, args.base, not args.ascii, tests)
+    else:
+        results = run_file(args.file, args.base, not args.ascii, tests)
+    for result in results.values():
+        print(
+            f"{result.name:12} {result.statistic:14.4f} p = {result.p_value:.6f}"
+            f"  {'random' if result.verdict else 'NOT random'}"
+        )
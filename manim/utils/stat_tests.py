@@ -0,0 +1,449 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+# The tests from the funnel grid in `Pi`, in the same order (Knuth, TAOCP vol. 2,
+# section 3.3.2). Every test works on a sequence of digits in some base; bits are
+# just digits in base 2.
+#
+# A test is run as `finish(count(digits))`. The output of `count` is a small set
+# of sufficient statistics, and `merge(count(a), count(b)) == count(a + b)`
+# exactly (`merge` may reuse the arrays of its first argument), so long inputs
+# can be processed piece by piece. Tests looking at groups of `block` digits
+# need every piece except the last to have a length divisible by `block`.
+
+ALPHA = 0.01
+
+
+@dataclass(frozen=True)
+class TestResult:
+    name: str
+    statistic: float
+    p_value: float
+    df: int = 0  # 0 means the statistic is a z-score
+
+    @property
+    def verdict(self):
+        # True = "Random", matching `Funnel.verdict`
+        return self.p_value >= ALPHA
+
+
+############### P-VALUES
+
+
+def normal_sf(z):
+    # two-sided
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def chi2_sf(x, df):
+    if x <= 0:
+        return 1.0
+    if df > 1000:
+        # Wilson-Hilferty; the serial test easily has millions of degrees of freedom
+        z = ((x / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+        return 0.5 * math.erfc(z / math.sqrt(2))
+    return _gammaincc(df / 2, x / 2)
+
+
+def _gammaincc(a, x, eps=1e-15, max_iter=100_000):
+    # Regularized upper incomplete gamma function Q(a, x), as in Numerical Recipes.
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        term = total = 1 / a
+        ap = a
+        for _ in range(max_iter):
+            ap += 1
+            term *= x / ap
+            total += term
+            if abs(term) < abs(total) * eps:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefix))
+
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, max_iter):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < eps:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def _lump(observed, expected, min_expected):
+    # Merge neighbouring categories until every one is expected to be hit
+    # at least `min_expected` times, so that the chi-square approximation holds.
+    obs, exp = [], []
+    acc_obs = acc_exp = 0.0
+    for o, e in zip(observed, expected):
+        acc_obs += o
+        acc_exp += e
+        if acc_exp >= min_expected:
+            obs.append(acc_obs)
+            exp.append(acc_exp)
+            acc_obs = acc_exp = 0.0
+    if acc_exp > 0:
+        if exp:
+            obs[-1] += acc_obs
+            exp[-1] += acc_exp
+        else:
+            obs.append(acc_obs)
+            exp.append(acc_exp)
+    return np.array(obs), np.array(exp)
+
+
+def chi_square(name, observed, probabilities, min_expected=5.0):
+    observed = np.asarray(observed, dtype=np.float64)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    keep = probabilities > 0
+    observed, expected = _lump(
+        observed[keep], observed.sum() * probabilities[keep], min_expected
+    )
+    if len(observed) < 2:
+        return TestResult(name, 0.0, 1.0, 0)
+    statistic = float(((observed - expected) ** 2 / expected).sum())
+    df = len(observed) - 1
+    return TestResult(name, statistic, chi2_sf(statistic, df), df)
+
+
+############### INPUT
+
+
+def as_digits(data, base=2):
+    if isinstance(data, str):
+        data = np.frombuffer("".join(data.split()).encode("ascii"), dtype=np.uint8)
+        data = data - ord("0")
+    digits = np.asarray(data, dtype=np.uint8)
+    if digits.size and digits.max() >= base:
+        raise ValueError(f"digit {digits.max()} out of range for base {base}")
+    return digits
+
+
+def unpack_bits(packed, count=None):
+    # `packed` as produced by np.packbits, most significant bit first
+    return np.unpackbits(np.asarray(packed, dtype=np.uint8), count=count)
+
+
+def window_codes(digits, k, base):
+    # Integer encoding of all k-digit windows lying inside `digits`
+    # (first digit is the most significant).
+    n = max(0, len(digits) - k + 1)
+    codes = np.zeros(n, dtype=np.int64)
+    for j in range(k):
+        codes *= base
+        codes += digits[j : j + n]
+    return codes
+
+
+def bit_window_codes(bits, k):
+    # Same as `window_codes(bits, k, 2)` for k <= 25, but reads the windows out
+    # of 32-bit big-endian words of the packed bits: one strided pass for each
+    # of the 8 bit offsets instead of one pass per window position.
+    n = max(0, len(bits) - k + 1)
+    packed = np.packbits(bits)
+    padded = np.concatenate([packed, np.zeros(4, dtype=np.uint8)])
+    words = np.zeros(len(packed) + 1, dtype=np.uint32)
+    for j in range(4):
+        words |= padded[j : j + len(words)].astype(np.uint32) << (24 - 8 * j)
+    codes = np.empty(n, dtype=np.uint32)
+    mask = np.uint32((1 << k) - 1)
+    for offset in range(8):
+        out = codes[offset::8]
+        out[:] = (words[: len(out)] >> (32 - k - offset)) & mask
+    return codes
+
+
+def _head(digits, length):
+    return np.array(digits[:length], dtype=np.uint8)
+
+
+def _tail(digits, length):
+    return np.array(digits[max(0, len(digits) - length) :], dtype=np.uint8)
+
+
+############### TESTS
+
+
+class FrequencyTest:
+    name = "frequency"
+    block = 1
+
+    def __init__(self, base=2):
+        self.base = base
+
+    def count(self, digits):
+        return np.bincount(digits, minlength=self.base)
+
+    def merge(self, a, b):
+        return a + b
+
+    def finish(self, counts):
+        return chi_square(self.name, counts, np.full(self.base, 1 / self.base))
+
+    def __call__(self, digits):
+        return self.finish(self.count(digits))
+
+
+class SerialTest:
+    # Overlapping k-grams over the cyclic sequence, scored with Good's
+    # generalized serial statistic (the one NIST uses). Thanks to the wrap-around,
+    # the counts of shorter windows are marginals of the k-gram counts, so one
+    # scan gives the test for every window length up to k (`finish_all`).
+    name = "serial"
+    block = 1
+
+    def __init__(self, base=2, k=2):
+        self.base = base
+        self.k = k
+
+    def _codes(self, digits):
+        if self.base == 2 and self.k <= 25:
+            return bit_window_codes(digits, self.k)
+        return window_codes(digits, self.k, self.base)
+
+    def _bincount(self, digits):
+        return np.bincount(self._codes(digits), minlength=self.base**self.k)
+
+    def count(self, digits):
+        # Windows crossing either end are completed from `head` and `tail`
+        # once the neighbours are known.
+        edge = self.k - 1
+        return self._bincount(digits), _head(digits, edge), _tail(digits, edge)
+
+    def merge(self, a, b):
+        # With k = 24 the counts take 128 MB, so `a` is updated in place.
+        edge = self.k - 1
+        counts = a[0]
+        counts += b[0]
+        np.add.at(counts, self._codes(np.concatenate([a[2], b[1]])), 1)
+        head = _head(np.concatenate([a[1], b[1]]), edge)
+        tail = _tail(np.concatenate([a[2], b[2]]), edge)
+        return counts, head, tail
+
+    def psi_squared(self, counts):
+        n = counts.sum()
+        if n == 0:
+            return 0.0
+        counts = counts.astype(np.float64)
+        return float(len(counts) / n * (counts**2).sum() - n)
+
+    def finish_all(self, stats):
+        counts, head, tail = stats
+        # wrap around
+        counts = counts.copy()
+        np.add.at(counts, self._codes(np.concatenate([tail, head])), 1)
+        psi = [self.psi_squared(counts)]
+        for _ in range(self.k):
+            counts = counts.reshape(-1, self.base).sum(axis=1)
+            psi.append(self.psi_squared(counts))
+        psi.reverse()  # psi[j] is for j-grams; psi[0] == 0
+
+        results = {}
+        for j in range(1, self.k + 1):
+            statistic = psi[j] - psi[j - 1]
+            df = self.base**j - self.base ** (j - 1)
+            results[j] = TestResult(self.name, statistic, chi2_sf(statistic, df), df)
+        return results
+
+    def finish(self, stats):
+        return self.finish_all(stats)[self.k]
+
+    def __call__(self, digits):
+        return self.finish(self.count(digits))
+
+
+class GapTest:
+    # Lengths of gaps between consecutive digits in [lo, hi).
+    name = "gap"
+    block = 1
+
+    def __init__(self, base=2, lo=0, hi=None, t=10):
+        self.base = base
+        self.lo = lo
+        self.hi = base // 2 if hi is None else hi
+        self.t = t
+        self.p = (self.hi - self.lo) / base
+
+    def count(self, digits):
+        # Gaps closed inside `digits`, plus the open ones before the first hit
+        # and after the last one.
+        hits = np.flatnonzero((digits >= self.lo) & (digits < self.hi))
+        gaps = np.diff(hits) - 1
+        counts = np.bincount(np.minimum(gaps, self.t), minlength=self.t + 1)
+        if len(hits) == 0:
+            return counts, len(digits), len(digits), False
+        return counts, int(hits[0]), int(len(digits) - 1 - hits[-1]), True
+
+    def merge(self, a, b):
+        counts_a, lead_a, trail_a, hit_a = a
+        counts_b, lead_b, trail_b, hit_b = b
+        counts = counts_a + counts_b
+        if hit_a and hit_b:
+            counts[min(trail_a + lead_b, self.t)] += 1
+        lead = lead_a if hit_a else lead_a + lead_b
+        trail = trail_b if hit_b else trail_a + trail_b
+        return counts, lead, trail, hit_a or hit_b
+
+    def finish(self, stats):
+        counts, lead, _, hit = stats
+        if hit:
+            # the gap from the start of the sequence counts too
+            counts = counts.copy()
+            counts[min(lead, self.t)] += 1
+        q = 1 - self.p
+        probabilities = [self.p * q**r for r in range(self.t)] + [q**self.t]
+        return chi_square(self.name, counts, probabilities)
+
+    def __call__(self, digits):
+        return self.finish(self.count(digits))
+
+
+def stirling2(n, k):
+    row = [1] + [0] * k
+    for i in range(1, n + 1):
+        for j in range(min(i, k), 0, -1):
+            row[j] = j * row[j] + row[j - 1]
+        row[0] = 0
+    return row[k]
+
+
+class PartitionTest:
+    # Knuth's poker test: number of distinct digits in each group of `size`.
+    name = "partition"
+
+    def __init__(self, base=2, size=5):
+        self.base = base
+        self.size = size
+        self.block = size
+
+    def count(self, digits):
+        groups = digits[: len(digits) // self.size * self.size].reshape(-1, self.size)
+        groups = np.sort(groups, axis=1)
+        distinct = 1 + np.count_nonzero(np.diff(groups, axis=1), axis=1)
+        return np.bincount(distinct, minlength=self.size + 1)[1:]
+
+    def merge(self, a, b):
+        return a + b
+
+    def finish(self, counts):
+        d, k = self.base, self.size
+        probabilities = [
+            math.perm(d, r) * stirling2(k, r) / d**k for r in range(1, k + 1)
+        ]
+        return chi_square(self.name, counts, probabilities)
+
+    def __call__(self, digits):
+        return self.finish(self.count(digits))
+
+
+class RunTest:
+    # Number of runs of equal digits. For uniform digits, each neighbouring pair
+    # differs independently with probability (base - 1) / base.
+    name = "run"
+    block = 1
+
+    def __init__(self, base=2):
+        self.base = base
+
+    def count(self, digits):
+        changes = int(np.count_nonzero(digits[1:] != digits[:-1]))
+        if len(digits) == 0:
+            return changes, 0, None, None
+        return changes, len(digits), int(digits[0]), int(digits[-1])
+
+    def merge(self, a, b):
+        if a[1] == 0:
+            return b
+        if b[1] == 0:
+            return a
+        changes = a[0] + b[0] + (a[3] != b[2])
+        return changes, a[1] + b[1], a[2], b[3]
+
+    def finish(self, stats):
+        changes, n = stats[:2]
+        if n < 2:
+            return TestResult(self.name, 0.0, 1.0)
+        p = (self.base - 1) / self.base
+        z = float((changes - (n - 1) * p) / math.sqrt((n - 1) * p * (1 - p)))
+        return TestResult(self.name, z, normal_sf(z))
+
+    def __call__(self, digits):
+        return self.finish(self.count(digits))
+
+
+class PermutationTest:
+    # Relative order of the digits in each group of `size`. Digits can tie, so the
+    # categories are orderings with ties, and their probabilities are found by
+    # enumerating all base**size groups.
+    name = "permutation"
+
+    def __init__(self, base=2, size=3):
+        if base**size > 1 << 20:
+            raise ValueError("too many groups to enumerate")
+        self.base = base
+        self.size = size
+        self.block = size
+        self.pairs = [(i, j) for i in range(size) for j in range(i + 1, size)]
+        everything = np.indices((base,) * size).reshape(size, -1).T
+        self.probabilities = np.bincount(
+            self._patterns(everything), minlength=3 ** len(self.pairs)
+        ) / len(everything)
+
+    def _patterns(self, groups):
+        groups = groups.astype(np.int16)
+        codes = np.zeros(len(groups), dtype=np.int64)
+        for i, j in self.pairs:
+            codes = 3 * codes + np.sign(groups[:, i] - groups[:, j]) + 1
+        return codes
+
+    def count(self, digits):
+        groups = digits[: len(digits) // self.size * self.size].reshape(-1, self.size)
+        return np.bincount(self._patterns(groups), minlength=len(self.probabilities))
+
+    def merge(self, a, b):
+        return a + b
+
+    def finish(self, counts):
+        return chi_square(self.name, counts, self.probabilities)
+
+    def __call__(self, digits):
+        return self.finish(self.count(digits))
+
+
+############### BATTERY
+
+
+def battery(base=2):
+    # Same order as the funnels in `Pi`
+    return [
+        SerialTest(base),
+        GapTest(base),
+        FrequencyTest(base),
+        PartitionTest(base),
+        RunTest(base),
+        PermutationTest(base),
+    ]
+
+
+def serial_sweep(data, max_k=24, base=2):
+    # {k: TestResult} for every k from 1 to max_k, from a single pass
+    test = SerialTest(base, max_k)
+    return test.finish_all(test.count(as_digits(data, base)))
+
+
+def run_battery(data, base=2, tests=None):
+    digits = as_digits(data, base)
+    if tests is None:
+        tests = battery(base)
+    return {test.name: test(digits) for test in tests}
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import pickle
+import re
+import shutil
+import subprocess
+import tempfile
+from importlib.metadata import version
+from pathlib import Path
+
+import manim.mobject.text.tex_mobject as tex_mobject
+from manim._config import config, logger
+from manim.mobject.svg.svg_mobject import SVG_HASH_TO_MOB_MAP, SVGMobject
+from manim.utils.iterables import hash_obj
+from manim.utils.tex_file_writing import print_all_tex_errors
+from utils.cache import atomic_write, cache_dir
+
+# A compile cache for Tex / MathTex shared by every render process (see
+# render_all.py). manim keeps its .tex/.svg files per media directory and
+# parses each SVG again in every process; here
+#  - the SVG of an expression is stored under the hash of the complete LaTeX
+#    document (template, environment, expression) and of the compiler, which is
+#    all LaTeX sees: colors are applied to the parsed paths afterwards, so the
+#    same file serves every color;
+#  - the parsed mobject is pickled next to it, keyed by that SVG and the options
+#    manim parses it with (which do include the default colors).
+# Every file is compiled in a private directory and renamed into place, so
+# workers racing on the same expression at worst both compile it. The pickles
+# are loaded without checks: the cache directory must be trusted.
+
+TEX_DIR = cache_dir("tex")
+PARSED_DIR = cache_dir("tex_parsed")
+
+
+def _compilers(tex_template):
+    compiler = tex_template.tex_compiler
+    return [compiler] if isinstance(compiler, str) else list(compiler)
+
+
+def tex_key(expression, environment=None, tex_template=None):
+    tex_template = tex_template or config["tex_template"]
+    if environment is not None:
+        code = tex_template.get_texcode_for_expression_in_env(expression, environment)
+    else:
+        code = tex_template.get_texcode_for_expression(expression)
+    text = "\n".join([*_compilers(tex_template), tex_template.output_format, code])
+    return hashlib.sha256(text.encode()).hexdigest()[:32], code
+
+
+def _latex_command(compiler, output_format, tex_file, work):
+    # the flags of manim's tex_compilation_command, as an argument list
+    if compiler in {"latex", "pdflatex", "luatex", "lualatex"}:
+        flags = [f"-output-format={output_format[1:]}"]
+    elif compiler == "xelatex" and output_format in {".xdv", ".pdf"}:
+        flags = ["-no-pdf"] if output_format == ".xdv" else []
+    else:
+        raise ValueError(f"cannot compile to {output_format} with {compiler}")
+    return [
+        compiler,
+        *flags,
+        "-interaction=batchmode",
+        "-halt-on-error",
+        f"-output-directory={work}",
+        str(tex_file),
+    ]
+
+
+def _typeset(code, tex_template, work):
+    # LaTeX in a directory of our own, which is kept when something fails, for
+    # the log; returns the .dvi/.xdv/.pdf
+    tex_file = work / "expression.tex"
+    tex_file.write_text(code, encoding="utf-8")
+    output_format = tex_template.output_format
+    for compiler in _compilers(tex_template):
+        command = _latex_command(compiler, output_format, tex_file, work)
+        if subprocess.run(command, stdout=subprocess.DEVNULL).returncode:
+            log_file = tex_file.with_suffix(".log")
+            print_all_tex_errors(log_file, compiler, tex_file)
+            raise ValueError(f"{compiler} failed, see {log_file}")
+    return tex_file.with_suffix(output_format)
+
+
+def _dvisvgm(dvi_file, output, pages="1"):
+    command = [
+        "dvisvgm",
+        *(["--pdf"] if dvi_file.suffix == ".pdf" else []),
+        f"--page={pages}",
+        "--no-fonts",
+        "--verbosity=0",
+        f"--output={output}",
+        str(dvi_file),
+    ]
+    subprocess.run(command, stdout=subprocess.DEVNULL)
+
+
+def compile_svg(code, tex_template, svg_file):
+    work = Path(tempfile.mkdtemp(prefix=".compile.", dir=TEX_DIR))
+    dvi_file = _typeset(code, tex_template, work)
+    svg = work / "expression.svg"
+    _dvisvgm(dvi_file, svg)
+    if not svg.exists():
+        raise ValueError(f"dvisvgm failed on {dvi_file}")
+    os.replace(svg, svg_file)
+    shutil.rmtree(work, ignore_errors=True)
+
+
+# Many expressions at once (see precompile_tex.py): the documents, which share
+# their preamble, become the pages of one standalone document, one LaTeX and one
+# dvisvgm run for all of them, and each page is stored as if compiled alone.
+# Every page is its own preview box, so the pages should match separate
+# compiles; the first one is compared with one before anything is stored.
+
+STANDALONE = re.compile(r"\\documentclass(?:\[([^\]]*)\])?\{standalone\}")
+PAGE = "texcachepage"
+
+
+def _split_document(code):
+    head, rest = code.split(r"\begin{document}", 1)
+    body, _ = rest.rsplit(r"\end{document}", 1)
+    return head, body
+
+
+def compile_svgs(codes, tex_template):
+    # codes: {key: document}; raises ValueError when they cannot be batched
+    # or LaTeX fails, so that the caller can fall back to compile_svg
+    heads, bodies = zip(*map(_split_document, codes.values()))
+    head = heads[0]
+    match = STANDALONE.search(head)
+    if match is None or any(other != head for other in heads):
+        raise ValueError("not a common standalone preamble")
+    options = ",".join(filter(None, [match[1], f"multi={PAGE}"]))
+    head = (
+        head[: match.start()]
+        + rf"\documentclass[{options}]{{standalone}}"
+        + head[match.end() :]
+    )
+    document = "".join(
+        [
+            head,
+            rf"\newenvironment{{{PAGE}}}{{}}{{}}",
+            "\n\\begin{document}\n",
+            *(rf"\begin{{{PAGE}}}{body}\end{{{PAGE}}}" + "\n" for body in bodies),
+            "\\end{document}\n",
+        ]
+    )
+    work = Path(tempfile.mkdtemp(prefix=".compile.", dir=TEX_DIR))
+    dvi_file = _typeset(document, tex_template, work)
+    _dvisvgm(dvi_file, work / "page-%p.svg", pages="1-")
+    pages = sorted(work.glob("page-*.svg"), key=lambda page: int(page.stem[5:]))
+    if len(pages) != len(codes):
+        raise ValueError(f"{len(pages)} pages for {len(codes)} expressions in {work}")
+    single = work / "single.svg"
+    compile_svg(next(iter(codes.values())), tex_template, single)
+    if single.read_bytes() != pages[0].read_bytes():
+        raise ValueError(f"page 1 differs from a separate compile in {work}")
+    for key, page in zip(codes, pages):
+        os.replace(page, TEX_DIR / f"{key}.svg")
+    shutil.rmtree(work, ignore_errors=True)
+
+
+def tex_to_svg_file(expression, environment=None, tex_template=None):
+    # drop-in for manim.utils.tex_file_writing.tex_to_svg_file
+    tex_template = tex_template or config["tex_template"]
+    key, code = tex_key(expression, environment, tex_template)
+    svg_file = TEX_DIR / f"{key}.svg"
+    if not svg_file.exists():
+        logger.info("Compiling %s to %s", expression, svg_file)
+        compile_svg(code, tex_template, svg_file)
+    return svg_file
+
+
+def _parsed_file(mob):
+    # same fields as SVGMobject.hash_seed, with the content-addressed file name
+    # instead of the path
+    seed = (
+        version("manim"),
+        type(mob).__name__,
+        mob.svg_default,
+        mob.path_string_config,
+        Path(mob.file_name).name,
+        str(config.renderer),
+    )
+    key = hashlib.sha256(repr(seed).encode()).hexdigest()[:32]
+    return PARSED_DIR / f"{key}.pickle"
+
+
+_init_svg_mobject = SVGMobject.init_svg_mobject
+
+
+def init_svg_mobject(self, use_svg_cache):
+    # fills manim's in-process SVG cache from disk before manim looks at it,
+    # and saves what manim parsed
+    if (
+        not use_svg_cache
+        or self.file_name is None
+        or Path(self.file_name).parent != TEX_DIR
+    ):
+        return _init_svg_mobject(self, use_svg_cache)
+    hash_val = hash_obj(self.hash_seed)
+    if hash_val in SVG_HASH_TO_MOB_MAP:
+        return _init_svg_mobject(self, use_svg_cache)
+    parsed_file = _parsed_file(self)
+    try:
+        SVG_HASH_TO_MOB_MAP[hash_val] = pickle.loads(parsed_file.read_bytes())
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass  # missing, or written by another manim
+    else:
+        return _init_svg_mobject(self, use_svg_cache)
+    _init_svg_mobject(self, use_svg_cache)
+    try:
+        data = pickle.dumps(SVG_HASH_TO_MOB_MAP[hash_val])
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return self
+    with atomic_write(parsed_file) as f:
+        f.write(data)
+    return self
+
+
+def install_tex_cache():
+    # tex_mobject imported tex_to_svg_file by name, so it is replaced there
+    tex_mobject.tex_to_svg_file = tex_to_svg_file
+    SVGMobject.init_svg_mobject = init_svg_mobject
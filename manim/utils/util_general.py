@@ -1,10 +1,37 @@
+import hashlib
+import os
 import random
 
+from utils.profiling import install_profiler
+from utils.tex_cache import install_tex_cache
+
 from manim import *
 
 ############### DEFAULT OPTIONS
 
-random.seed(0)
+ROOT_SEED = 0
+random.seed(ROOT_SEED)
+install_tex_cache()
+if os.environ.get("SCENE_PROFILE"):  # see utils/profiling.py
+    install_profiler()
+
+
+############### SEEDING
+# Each scene, and each use of randomness inside it, gets its own generator
+# seeded from its name and a label. What a scene draws does not depend on which
+# scenes ran before it in the same process, so scenes rendered in parallel
+# processes come out the same as in one serial run.
+
+
+def derive_seed(*labels):
+    text = "/".join(str(label) for label in (ROOT_SEED, *labels))
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+def scene_random(scene, label=""):
+    # random.Random for a scene (or its name) and a call site label
+    name = scene if isinstance(scene, str) else type(scene).__name__
+    return random.Random(derive_seed(name, label))
 
 
 def set_default_colors():
@@ -33,35 +60,35 @@ def make_code(text):
 # self.add_sound(file_name)
 
 
-def random_click_file():
-    return f"audio/click/click_{random.randint(0, 3)}.wav"
+def random_click_file(rng=random):
+    return f"audio/click/click_{rng.randint(0, 3)}.wav"
 
 
-def random_pop_file():
-    return f"audio/pop/pop_{random.randint(0, 6)}.wav"
+def random_pop_file(rng=random):
+    return f"audio/pop/pop_{rng.randint(0, 6)}.wav"
 
 
-def random_whoosh_file():
-    return f"audio/whoosh/whoosh_{random.randint(0, 3)}.wav"
+def random_whoosh_file(rng=random):
+    return f"audio/whoosh/whoosh_{rng.randint(0, 3)}.wav"
 
 
 whoosh_gain = -8
 
 
-def random_tick_file():
-    return f"audio/tick/tick_{random.randint(0, 7)}.wav"
+def random_tick_file(rng=random):
+    return f"audio/tick/tick_{rng.randint(0, 7)}.wav"
 
 
-def random_whoops_file():
-    return f"audio/whoops/whoops{random.randint(1, 1)}.mp3"
+def random_whoops_file(rng=random):
+    return f"audio/whoops/whoops{rng.randint(1, 1)}.mp3"
 
 
-def random_rubik_file():
-    return f"audio/cube/r{random.randint(1, 20)}.wav"
+def random_rubik_file(rng=random):
+    return f"audio/cube/r{rng.randint(1, 20)}.wav"
 
 
-def random_typewriter_file():
-    return f"audio/typewriter/t{random.randint(0, 9)}.wav"
+def random_typewriter_file(rng=random):
+    return f"audio/typewriter/t{rng.randint(0, 9)}.wav"
 
 
 def step_sound_file(randomize=True):
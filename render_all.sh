@@ -7,8 +7,5 @@ set -eo pipefail
 cd "$(dirname "$0")"
 cd manim/
 
-filenames="anims.py prng.py statistical_test.py"
-
-for filename in $filenames; do
-	manim -qk $filename --write_all
-done
+# one manim process per scene, in parallel, longest scenes first
+python render_all.py "$@"